@@ -1,12 +1,57 @@
+import asyncio
+import logging
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Optional
 from config import GROQ_API_KEY, GROQ_MODEL
+from cache import TTLCache
+
+log = logging.getLogger(__name__)
+
+# Explanations keyed by (skill_name, career_goal, learning_stage); templates are
+# fixed, so the same triples come back for every user
+_EXPLANATION_CACHE = TTLCache(maxsize=4096, ttl=86400)
+
+# Static prompt pieces, built once and shared by every request
+_EXPLANATION_PROMPT = 'Why is "{skill}" important for someone learning to become a {goal}? Learning stage: {stage}.'.format
+_EXPLANATION_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "Career mentor. Answer in 2-3 motivating, practical sentences with real-world uses."  # sets AI personality/behavior
+}
+
+# Groq calls in flight per batch; keeps a large template from tripping rate limits
+_MAX_CONCURRENT_EXPLANATIONS = 8
 
 class AIService:
     def __init__(self):
         self.api_key = GROQ_API_KEY
         self.model = GROQ_MODEL
         self.base_url = "https://api.groq.com/openai/v1/chat/completions"
+        
+        # One pooled keep-alive session so batch calls reuse the TLS connection.
+        # Only connection failures are retried: those requests never reached Groq.
+        # Completions are billed and not idempotent, so read timeouts and error
+        # statuses go straight back to the caller (read=False re-raises the
+        # timeout as requests' Timeout instead of wrapping it in ConnectionError)
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            max_retries=Retry(
+                total=2,
+                connect=2,
+                read=False,
+                status=0,
+                other=0,
+                backoff_factor=0.2
+            )
+        ))
+        self.session.headers.update({
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+            "Connection": "keep-alive"
+        })
     
     def generate_skill_explanation(
         self, 
@@ -16,69 +61,99 @@ class AIService:
     ) -> str:
         """Generate AI explanation for why a skill is important"""
         
-        prompt = f"""You are a career mentor. Explain in 2-3 sentences why "{skill_name}" is important for someone learning to become a {career_goal}. 
+        cache_key = (skill_name, career_goal, learning_stage)
+        cached = _EXPLANATION_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
         
-Learning Stage: {learning_stage}
-
-Keep it motivating, practical, and beginner-friendly. Focus on real-world applications."""
-
         try:
-            
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",#proves who you are
-                #bearer{self.api_key} is the token(from groq) that proves your identity
-                "Content-Type": "application/json"#type of data being sent
-            }
-            
             data = {
                 "model": self.model,
                 "messages": [
-                    {
-                        "role": "system",
-                        "content": "You are a helpful career mentor who explains technical concepts clearly."#sets AI personality/behavior
-                    },
+                    _EXPLANATION_SYSTEM_MESSAGE,
                     {
                         "role": "user",
-                        "content": prompt #user's input/question(prompt)
+                        "content": _EXPLANATION_PROMPT(skill=skill_name, goal=career_goal, stage=learning_stage)
                     }
                 ],
                 "temperature": 0.7,
-                "max_tokens": 150
+                "max_tokens": 90,  # 2-3 sentences is ~60 tokens
+                "stop": ["\n\n"]
             }
             
-            response = requests.post(self.base_url, headers=headers, json=data, timeout=10)
+            response = self.session.post(self.base_url, json=data, timeout=10)
             
             if response.status_code == 200:
                 result = response.json()
                 explanation = result["choices"][0]["message"]["content"].strip()
+                _EXPLANATION_CACHE.set(cache_key, explanation)
                 return explanation
             else:
-                print(f"Groq API error: {response.status_code}")
+                log.warning("Groq API error: %s", response.status_code)
                 return self._get_fallback_explanation(skill_name, career_goal)
                 
-        except Exception as e:
-            print(f" AI generation failed: {str(e)}")
+        except Exception:
+            log.exception("AI generation failed")
             return self._get_fallback_explanation(skill_name, career_goal)
     
+    def chat_completion(
+        self,
+        messages: list,
+        max_tokens: int = 500,
+        timeout: float = 30
+    ) -> requests.Response:
+        """Send a chat completion over the pooled session and return the raw response
+
+        Only connection failures are retried, so a read timeout surfaces as
+        requests.Timeout and 429/5xx come back as the response itself.
+        """
+        data = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": 0.7,
+            "max_tokens": max_tokens
+        }
+        return self.session.post(self.base_url, json=data, timeout=timeout)
+    
+    async def achat_completion(self, messages: list, **kwargs) -> requests.Response:
+        """Async variant of chat_completion (runs the HTTP call in a worker thread)"""
+        return await asyncio.to_thread(self.chat_completion, messages, **kwargs)
+    
     def _get_fallback_explanation(self, skill_name: str, career_goal: str) -> str:
         """Fallback explanation if AI fails"""
         return f"{skill_name} is a fundamental skill for {career_goal} that will help you build professional projects and advance your career."
     
-    def generate_batch_explanations(self, skills: list, career_goal: str) -> dict:
-        """Generate explanations for multiple skills"""
-        explanations = {}
+    async def agenerate_skill_explanation(
+        self, 
+        skill_name: str, 
+        career_goal: str, 
+        learning_stage: str
+    ) -> str:
+        """Async variant of generate_skill_explanation (runs the HTTP call in a worker thread)"""
+        return await asyncio.to_thread(
+            self.generate_skill_explanation,
+            skill_name,
+            career_goal,
+            learning_stage
+        )
+    
+    async def generate_batch_explanations(self, skills: list, career_goal: str) -> dict:
+        """Generate explanations for multiple skills concurrently (at most 8 in flight)"""
+        limit = asyncio.Semaphore(_MAX_CONCURRENT_EXPLANATIONS)
         
-        for skill in skills:
-            skill_name = skill["name"]
-            learning_stage = skill["stage"]
-            
-            explanation = self.generate_skill_explanation(
-                skill_name, 
-                career_goal, 
-                learning_stage
-            )
-            
-            explanations[skill_name] = explanation
+        async def explain(skill):
+            async with limit:
+                return await self.agenerate_skill_explanation(skill["name"], career_goal, skill["stage"])
+        
+        tasks = [explain(skill) for skill in skills]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        
+        explanations = {}
+        for skill, result in zip(skills, results):
+            if isinstance(result, Exception):
+                log.warning("AI generation failed for %s: %s", skill["name"], result)
+                result = self._get_fallback_explanation(skill["name"], career_goal)
+            explanations[skill["name"]] = result
         
         return explanations
 
@@ -1,17 +1,28 @@
+from __future__ import annotations
+
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from typing import Optional
+import hashlib
+import hmac
+import os
 import sqlite3
+import time
 
-from config import JWT_SECRET, JWT_ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from config import JWT_SECRET, JWT_ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, BCRYPT_ROUNDS
 from database import Database
 from models import TokenData
+from cache import TTLCache
 
 # Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    bcrypt__ident="2b"
+)
 
 # OAuth2 scheme for token-based auth
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
@@ -19,18 +30,43 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 # Database instance
 db = Database()
 
+# Tokens only carry "sub" and "exp"; skip checks for claims we never issue
+_JWT_DECODE_OPTIONS = {
+    "verify_aud": False,
+    "verify_iss": False,
+    "verify_jti": False,
+    "verify_at_hash": False,
+    "require_exp": True,
+    "require_sub": True,
+}
+
+# Verified token -> user row, keyed by a hash so raw tokens are never stored
+_TOKEN_CACHE = TTLCache(maxsize=10_000, ttl=10)
+
+# Recent successful logins, so repeat logins skip bcrypt. Keys are HMACs under a
+# per-process random pepper, so nothing in the cache is reusable across restarts
+_LOGIN_PEPPER = os.urandom(32)
+_LOGIN_CACHE = TTLCache(maxsize=2048, ttl=30)
+
+def _truncate_password(password: str):
+    """Clip a password to bcrypt's 72-byte limit (bytes, not characters)"""
+    if password.isascii():
+        # One byte per character, no encode needed
+        return password[:72]
+    
+    # Same 72 bytes bcrypt itself would keep, so existing hashes still verify
+    return password.encode('utf-8')[:72]
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return pwd_context.verify(_truncate_password(plain_password), hashed_password)
 
 def get_password_hash(password: str) -> str:
     """Hash a password"""
-    # Bcrypt has a 72-byte limit, so we truncate to be safe
-    if len(password.encode('utf-8')) > 72:
-        password = password[:72]
-    return pwd_context.hash(password)
+    # Bcrypt has a 72-byte limit; hash and verify must truncate the same way
+    return pwd_context.hash(_truncate_password(password))
 
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+def create_access_token(data: dict, expires_delta: timedelta | None = None):
     """Create JWT access token"""
     to_encode = data.copy()
     
@@ -45,14 +81,11 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
 def get_user_by_username(username: str):
     """Fetch user from database by username"""
-    conn = db.get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
-    user = cursor.fetchone()
-    conn.close()
-    
-    return user
+    with db.connection() as conn:
+        return conn.execute(
+            "SELECT id, username, password_hash, email, created_at FROM users WHERE username = ? LIMIT 1",
+            (username,)
+        ).fetchone()
 
 def authenticate_user(username: str, password: str):
     """Authenticate user with username and password"""
@@ -61,13 +94,28 @@ def authenticate_user(username: str, password: str):
     if not user:
         return False
     
+    # The stored hash is part of the key, so a password change invalidates it
+    cache_key = hmac.new(
+        _LOGIN_PEPPER,
+        "\0".join((username, user["password_hash"], password)).encode(),
+        hashlib.sha256
+    ).digest()
+    if _LOGIN_CACHE.get(cache_key) == user["id"]:
+        return user
+    
     if not verify_password(password, user["password_hash"]):
         return False
     
+    _LOGIN_CACHE.set(cache_key, user["id"])
     return user
 
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     """Dependency to get current authenticated user"""
+    cache_key = hashlib.sha256(token.encode()).digest()[:16]
+    cached_user = _TOKEN_CACHE.get(cache_key)
+    if cached_user is not None:
+        return cached_user
+    
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -75,7 +123,12 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     )
     
     try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        payload = jwt.decode(
+            token,
+            JWT_SECRET,
+            algorithms=[JWT_ALGORITHM],
+            options=_JWT_DECODE_OPTIONS
+        )
         username: str = payload.get("sub")
         
         if username is None:
@@ -83,6 +136,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         
         token_data = TokenData(username=username)
     except JWTError:
+        _TOKEN_CACHE.pop(cache_key)
         raise credentials_exception
     
     user = get_user_by_username(username=token_data.username)
@@ -90,35 +144,32 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     if user is None:
         raise credentials_exception
     
+    # Never cache past the token's own expiry
+    ttl = _TOKEN_CACHE.ttl
+    if "exp" in payload:
+        ttl = min(ttl, payload["exp"] - time.time())
+    if ttl > 0:
+        _TOKEN_CACHE.set(cache_key, user, ttl=ttl)
+    
     return user
 
-def create_user(username: str, password: str, email: Optional[str] = None):
+def create_user(username: str, password: str, email: str | None = None):
     """Create a new user"""
-    conn = db.get_connection()
-    cursor = conn.cursor()
+    password_hash = get_password_hash(password)
     
-    # Check if user exists
-    cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-    if cursor.fetchone():
-        conn.close()
+    # Insert-or-skip in one statement; no row back means the username is taken
+    with db.connection() as conn:
+        user = conn.execute(
+            """INSERT INTO users (username, password_hash, email) VALUES (?, ?, ?)
+               ON CONFLICT(username) DO NOTHING
+               RETURNING id, username, password_hash, email, created_at""",
+            (username, password_hash, email)
+        ).fetchone()
+    
+    if user is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already registered"
         )
     
-    # Create user
-    password_hash = get_password_hash(password)
-    cursor.execute(
-        "INSERT INTO users (username, password_hash, email) VALUES (?, ?, ?)",
-        (username, password_hash, email)
-    )
-    
-    user_id = cursor.lastrowid
-    conn.commit()
-    
-    # Fetch created user
-    cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
-    user = cursor.fetchone()
-    conn.close()
-    
     return user
\ No newline at end of file
@@ -1,7 +1,13 @@
+from __future__ import annotations
+
 from dotenv import load_dotenv
 load_dotenv()
 import os
-from typing import List, Dict
+import json
+from functools import lru_cache
+from pathlib import Path
+from collections.abc import Mapping
+from types import MappingProxyType
 
 # API Configuration
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
@@ -12,100 +18,48 @@ JWT_SECRET = os.getenv("JWT_SECRET")
 JWT_ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours
 
-# Predefined Career Goals with skill templates
-CAREER_GOALS = {
-    "Web Developer": {
-        "beginner": [
-            {"name": "HTML Basics", "stage": "Beginner", "hours": 10},
-            {"name": "CSS Fundamentals", "stage": "Beginner", "hours": 15},
-            {"name": "JavaScript Basics", "stage": "Beginner", "hours": 20},
-            {"name": "Responsive Design", "stage": "Beginner", "hours": 12},
-            {"name": "Git & GitHub", "stage": "Beginner", "hours": 8},
-            {"name": "Frontend Framework (React/Vue)", "stage": "Intermediate", "hours": 30},
-            {"name": "Backend Basics (Node.js/Python)", "stage": "Intermediate", "hours": 25},
-            {"name": "Databases (SQL)", "stage": "Intermediate", "hours": 20},
-            {"name": "REST APIs", "stage": "Intermediate", "hours": 15},
-            {"name": "Deployment & Hosting", "stage": "Intermediate", "hours": 10}
-        ],
-        "intermediate": [
-            {"name": "Advanced JavaScript (ES6+)", "stage": "Intermediate", "hours": 20},
-            {"name": "State Management (Redux/Vuex)", "stage": "Intermediate", "hours": 15},
-            {"name": "Backend Framework (Express/FastAPI)", "stage": "Intermediate", "hours": 25},
-            {"name": "Authentication & Security", "stage": "Advanced", "hours": 20},
-            {"name": "Database Design & Optimization", "stage": "Advanced", "hours": 18},
-            {"name": "Testing (Unit & Integration)", "stage": "Advanced", "hours": 15},
-            {"name": "CI/CD Pipelines", "stage": "Advanced", "hours": 12},
-            {"name": "Docker & Containers", "stage": "Advanced", "hours": 20},
-            {"name": "Cloud Services (AWS/GCP)", "stage": "Advanced", "hours": 25},
-            {"name": "Performance Optimization", "stage": "Advanced", "hours": 15}
-        ]
-    },
-    "Data Analyst": {
-        "beginner": [
-            {"name": "Excel Fundamentals", "stage": "Beginner", "hours": 15},
-            {"name": "Statistics Basics", "stage": "Beginner", "hours": 20},
-            {"name": "SQL for Data Analysis", "stage": "Beginner", "hours": 25},
-            {"name": "Python Basics", "stage": "Beginner", "hours": 20},
-            {"name": "Data Visualization Basics", "stage": "Beginner", "hours": 12},
-            {"name": "Pandas & NumPy", "stage": "Intermediate", "hours": 25},
-            {"name": "Data Cleaning Techniques", "stage": "Intermediate", "hours": 18},
-            {"name": "Tableau/Power BI", "stage": "Intermediate", "hours": 20},
-            {"name": "Statistical Analysis", "stage": "Intermediate", "hours": 22},
-            {"name": "Business Intelligence Concepts", "stage": "Intermediate", "hours": 15}
-        ],
-        "intermediate": [
-            {"name": "Advanced SQL Queries", "stage": "Intermediate", "hours": 20},
-            {"name": "Python Data Analysis Libraries", "stage": "Intermediate", "hours": 25},
-            {"name": "Machine Learning Basics", "stage": "Advanced", "hours": 30},
-            {"name": "A/B Testing & Experimentation", "stage": "Advanced", "hours": 18},
-            {"name": "Big Data Tools (Spark)", "stage": "Advanced", "hours": 25},
-            {"name": "Advanced Data Visualization", "stage": "Advanced", "hours": 15},
-            {"name": "Predictive Analytics", "stage": "Advanced", "hours": 20},
-            {"name": "Data Warehousing", "stage": "Advanced", "hours": 18},
-            {"name": "ETL Processes", "stage": "Advanced", "hours": 15},
-            {"name": "Dashboard Design & Strategy", "stage": "Advanced", "hours": 12}
-        ]
-    },
-    "App Developer": {
-        "beginner": [
-            {"name": "Programming Fundamentals", "stage": "Beginner", "hours": 20},
-            {"name": "Mobile UI/UX Basics", "stage": "Beginner", "hours": 15},
-            {"name": "Choose Platform (iOS/Android)", "stage": "Beginner", "hours": 10},
-            {"name": "Swift/Kotlin Basics", "stage": "Beginner", "hours": 30},
-            {"name": "Mobile App Architecture", "stage": "Beginner", "hours": 18},
-            {"name": "API Integration", "stage": "Intermediate", "hours": 20},
-            {"name": "Local Data Storage", "stage": "Intermediate", "hours": 15},
-            {"name": "Navigation Patterns", "stage": "Intermediate", "hours": 12},
-            {"name": "Testing Mobile Apps", "stage": "Intermediate", "hours": 15},
-            {"name": "App Store Deployment", "stage": "Intermediate", "hours": 10}
-        ],
-        "intermediate": [
-            {"name": "Cross-Platform Development (React Native/Flutter)", "stage": "Intermediate", "hours": 35},
-            {"name": "Advanced State Management", "stage": "Intermediate", "hours": 18},
-            {"name": "Push Notifications", "stage": "Advanced", "hours": 12},
-            {"name": "In-App Purchases", "stage": "Advanced", "hours": 15},
-            {"name": "App Performance Optimization", "stage": "Advanced", "hours": 20},
-            {"name": "Security Best Practices", "stage": "Advanced", "hours": 18},
-            {"name": "Offline Functionality", "stage": "Advanced", "hours": 15},
-            {"name": "App Analytics Integration", "stage": "Advanced", "hours": 10},
-            {"name": "CI/CD for Mobile Apps", "stage": "Advanced", "hours": 15},
-            {"name": "Advanced Animation & Gestures", "stage": "Advanced", "hours": 20}
-        ]
-    }
-}
+# CORS: deployed origins come from ALLOWED_ORIGINS as a comma-separated list,
+# and only those are allowed. Without it (local development) the bundled
+# frontend may call from any port on localhost / 127.0.0.1, or from a page
+# opened straight from disk, which browsers send as Origin "null"
+_ALLOWED_ORIGINS = [
+    origin.strip()
+    for origin in os.getenv("ALLOWED_ORIGINS", "").split(",")
+    if origin.strip()
+]
+CORS_ORIGINS: list[str] = _ALLOWED_ORIGINS or ["null"]
+CORS_ORIGIN_REGEX: str | None = (
+    None if _ALLOWED_ORIGINS else r"https?://(localhost|127\.0\.0\.1)(:\d+)?"
+)
+CORS_MAX_AGE = 86400  # let browsers cache preflight responses for a day
+
+# bcrypt work factor (each +1 doubles hashing time; existing hashes keep their own cost)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "10"))
+
+# Predefined Career Goals with skill templates, loaded once from career_goals.json
+with open(Path(__file__).with_name("career_goals.json"), encoding="utf-8") as _f:
+    CAREER_GOALS: dict[str, dict[str, list[dict]]] = json.load(_f)
 
-def get_available_career_goals() -> List[str]:
-    """Return list of available career goals"""
+@lru_cache(maxsize=1)
+def get_available_career_goals() -> list[str]:
+    """Return list of available career goals (built once; do not mutate)"""
     return list(CAREER_GOALS.keys())
 
-def get_roadmap_template(career_goal: str, learning_level: str) -> List[Dict]:
+_CAREER_GOAL_SET = frozenset(CAREER_GOALS)
+
+def is_valid_career_goal(career_goal: str) -> bool:
+    """O(1) check that a career goal has templates"""
+    return career_goal in _CAREER_GOAL_SET
+
+# Flat (career_goal, level) -> skills lookup built once at import. Skill dicts are
+# wrapped read-only so the shared templates can be handed to every request
+_TEMPLATE_INDEX = {
+    (goal.lower(), level): tuple(MappingProxyType(skill) for skill in skills)
+    for goal, levels in CAREER_GOALS.items()
+    for level, skills in levels.items()
+}
+_EMPTY_TEMPLATE = ()
+
+def get_roadmap_template(career_goal: str, learning_level: str) -> tuple[Mapping, ...]:
     """Get skill template for a specific career goal and level"""
-    level_key = learning_level.lower()
-    
-    if career_goal not in CAREER_GOALS:
-        return []
-    
-    if level_key not in CAREER_GOALS[career_goal]:
-        return []
-    
-    return CAREER_GOALS[career_goal][level_key]
\ No newline at end of file
+    return _TEMPLATE_INDEX.get((career_goal.lower(), learning_level.lower()), _EMPTY_TEMPLATE)
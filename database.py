@@ -1,141 +1,245 @@
 import sqlite3
+import logging
+import threading
+import queue
+import atexit
+from contextlib import contextmanager
 from datetime import datetime
 import json
 
+log = logging.getLogger(__name__)
+
 class Database:
-    def __init__(self, db_name="learning_roadmap.db"):
+    # Database files whose schema was already created in this process
+    _initialized = set()
+    
+    # Most connections open at once; callers beyond this wait for one to be returned
+    POOL_SIZE = 20
+    
+    def __init__(self, db_name="learning_roadmap.db", pool_size=POOL_SIZE):
         self.db_name = db_name
+        self._pool = queue.LifoQueue()
+        self._pool_slots = threading.BoundedSemaphore(pool_size)
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        atexit.register(self.close_all)
         self.init_database()
     
     def get_connection(self):
-        conn = sqlite3.connect(self.db_name)
+        """
+        Open a new connection with the standard pragmas.
+        Endpoints should borrow one from the pool via connection() instead.
+        """
+        # Pooled connections live for the whole process, so give every distinct
+        # query in the app a slot in the prepared-statement cache
+        conn = sqlite3.connect(self.db_name, check_same_thread=False, cached_statements=256)
         conn.row_factory = sqlite3.Row
+        # auto_vacuum only takes effect on a brand-new file, so it must come first
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-65536")  # 64 MiB page cache
+        conn.execute("PRAGMA mmap_size=268435456")  # 256 MiB memory-mapped reads
+        conn.execute("PRAGMA foreign_keys=ON")
+        with self._connections_lock:
+            self._connections.append(conn)
         return conn
     
-    def init_database(self):
-        """Initialize all database tables"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Users table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL,
-                email TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Roadmaps table (UPDATED with new columns)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS roadmaps (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                career_goal TEXT NOT NULL,
-                learning_level TEXT NOT NULL,
-                existing_skills TEXT,
-                metadata TEXT,
-                last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
-            )
-        ''')
+    @contextmanager
+    def connection(self):
+        """
+        Check a connection out of the pool for one unit of work.
+        Commits when the block exits normally, rolls back if it raises,
+        and returns the connection to the pool either way.
+        """
+        self._pool_slots.acquire()
+        try:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                conn = self.get_connection()
+            
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            else:
+                conn.commit()
+            finally:
+                self._pool.put(conn)
+        finally:
+            self._pool_slots.release()
+    
+    def close_all(self):
+        """Optimize and close every pooled connection (runs at exit)"""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        self._pool = queue.LifoQueue()
         
-        # Skills table (keep for backward compatibility)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS skills (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                roadmap_id INTEGER NOT NULL,
-                skill_name TEXT NOT NULL,
-                learning_stage TEXT NOT NULL,
-                order_index INTEGER NOT NULL,
-                why_important TEXT,
-                estimated_hours INTEGER,
-                FOREIGN KEY (roadmap_id) REFERENCES roadmaps (id) ON DELETE CASCADE
-            )
-        ''')
+        for conn in connections:
+            try:
+                conn.execute("PRAGMA optimize")
+                conn.close()
+            except sqlite3.Error:
+                pass
+    
+    def init_database(self):
+        """Initialize all database tables (once per process per database file)"""
+        if self.db_name in Database._initialized:
+            return
         
-        # Skill status tracking table (keep for backward compatibility)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS skill_status (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                skill_id INTEGER NOT NULL,
-                status TEXT DEFAULT 'NOT_STARTED',
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (skill_id) REFERENCES skills (id) ON DELETE CASCADE,
-                CHECK (status IN ('NOT_STARTED', 'IN_PROGRESS', 'COMPLETED'))
-            )
-        ''')
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            # Create the whole schema in one transaction
+            with conn:
+                cursor.execute("BEGIN")
+                
+                # Users table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS users (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        username TEXT UNIQUE NOT NULL,
+                        password_hash TEXT NOT NULL,
+                        email TEXT,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+                
+                # Roadmaps table (UPDATED with new columns)
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS roadmaps (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        user_id INTEGER NOT NULL,
+                        career_goal TEXT NOT NULL,
+                        learning_level TEXT NOT NULL,
+                        existing_skills TEXT,
+                        metadata TEXT,
+                        last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+                    )
+                ''')
+                
+                # Skills table (keep for backward compatibility)
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS skills (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        roadmap_id INTEGER NOT NULL,
+                        skill_name TEXT NOT NULL,
+                        learning_stage TEXT NOT NULL,
+                        order_index INTEGER NOT NULL,
+                        why_important TEXT,
+                        estimated_hours INTEGER,
+                        FOREIGN KEY (roadmap_id) REFERENCES roadmaps (id) ON DELETE CASCADE
+                    )
+                ''')
+                
+                # Skill status tracking table (keep for backward compatibility)
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS skill_status (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        skill_id INTEGER NOT NULL,
+                        status TEXT DEFAULT 'NOT_STARTED',
+                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        FOREIGN KEY (skill_id) REFERENCES skills (id) ON DELETE CASCADE,
+                        CHECK (status IN ('NOT_STARTED', 'IN_PROGRESS', 'COMPLETED'))
+                    )
+                ''')
+                
+                # NEW: Level progress table for game-style tracking
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS level_progress (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        roadmap_id INTEGER NOT NULL,
+                        level_number INTEGER NOT NULL,
+                        completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        xp_earned INTEGER DEFAULT 0,
+                        time_spent_minutes INTEGER DEFAULT 0,
+                        task_answer TEXT,
+                        FOREIGN KEY (roadmap_id) REFERENCES roadmaps (id) ON DELETE CASCADE,
+                        UNIQUE(roadmap_id, level_number)
+                    )
+                ''')
+                
+                # Indexes for the roadmap -> skills -> status joins and per-user listings
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_skills_roadmap ON skills(roadmap_id, order_index)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_skill_status_skill ON skill_status(skill_id)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_roadmaps_user ON roadmaps(user_id, created_at DESC)")
+            
+            # Gather planner statistics once; PRAGMA optimize keeps them fresh at exit
+            has_stats = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+            ).fetchone()
+            if not has_stats:
+                with conn:
+                    conn.execute("ANALYZE")
         
-        # NEW: Level progress table for game-style tracking
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS level_progress (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                roadmap_id INTEGER NOT NULL,
-                level_number INTEGER NOT NULL,
-                completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                xp_earned INTEGER DEFAULT 0,
-                time_spent_minutes INTEGER DEFAULT 0,
-                task_answer TEXT,
-                FOREIGN KEY (roadmap_id) REFERENCES roadmaps (id) ON DELETE CASCADE,
-                UNIQUE(roadmap_id, level_number)
-            )
-        ''')
+        Database._initialized.add(self.db_name)
+        log.info("Database initialized: %s", self.db_name)
+    
+    def get_user_skill_counts(self, user_id):
+        """Return {status: count} over every skill in the user's roadmaps"""
+        with self.connection() as conn:
+            rows = conn.execute("""
+                SELECT ss.status, COUNT(*)
+                FROM skill_status ss
+                JOIN skills s ON ss.skill_id = s.id
+                JOIN roadmaps r ON s.roadmap_id = r.id
+                WHERE r.user_id = ?
+                GROUP BY ss.status
+            """, (user_id,)).fetchall()
         
-        conn.commit()
-        conn.close()
-        print("✅ Database initialized successfully!")
+        return {status: count for status, count in rows}
     
     def migrate_existing_roadmaps(self):
         """
         Add metadata and last_activity columns to existing roadmaps table
         Run this ONCE if you have existing data
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        try:
-            # Check if metadata column exists
-            cursor.execute("PRAGMA table_info(roadmaps)")
-            columns = [column[1] for column in cursor.fetchall()]
+        with self.connection() as conn:
+            cursor = conn.cursor()
             
-            if 'metadata' not in columns:
-                cursor.execute("ALTER TABLE roadmaps ADD COLUMN metadata TEXT")
-                print("Added 'metadata' column to roadmaps")
-            
-            if 'last_activity' not in columns:
-                cursor.execute("ALTER TABLE roadmaps ADD COLUMN last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP")
-                print(" Added 'last_activity' column to roadmaps")
-            
-            conn.commit()
-            print("Migration completed successfully!")
-            
-        except Exception as e:
-            print(f" Migration error (may be safe to ignore): {e}")
-        finally:
-            conn.close()
+            try:
+                # Check if metadata column exists
+                cursor.execute("PRAGMA table_info(roadmaps)")
+                columns = [column[1] for column in cursor.fetchall()]
+                
+                if 'metadata' not in columns:
+                    cursor.execute("ALTER TABLE roadmaps ADD COLUMN metadata TEXT")
+                    log.info("Added 'metadata' column to roadmaps")
+                
+                if 'last_activity' not in columns:
+                    cursor.execute("ALTER TABLE roadmaps ADD COLUMN last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP")
+                    log.info("Added 'last_activity' column to roadmaps")
+                
+                conn.commit()
+                log.info("Migration completed successfully")
+                
+            except Exception as e:
+                conn.rollback()
+                log.warning("Migration error (may be safe to ignore): %s", e)
     
     def reset_database(self):
         """Drop all tables and reinitialize (useful for development)"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("DROP TABLE IF EXISTS level_progress")
-        cursor.execute("DROP TABLE IF EXISTS skill_status")
-        cursor.execute("DROP TABLE IF EXISTS skills")
-        cursor.execute("DROP TABLE IF EXISTS roadmaps")
-        cursor.execute("DROP TABLE IF EXISTS users")
-        
-        conn.commit()
-        conn.close()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("DROP TABLE IF EXISTS level_progress")
+            cursor.execute("DROP TABLE IF EXISTS skill_status")
+            cursor.execute("DROP TABLE IF EXISTS skills")
+            cursor.execute("DROP TABLE IF EXISTS roadmaps")
+            cursor.execute("DROP TABLE IF EXISTS users")
         
+        Database._initialized.discard(self.db_name)
         self.init_database()
-        print(" Database reset complete!")
+        log.info("Database reset complete")
 
 # Initialize database when this module is imported
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     db = Database()
     
     # Run migration for existing databases
@@ -5,7 +5,88 @@ Inspired by Duolingo + Candy Crush game design
 """
 
 from typing import List, Dict
-import json
+from urllib.parse import quote_plus
+from types import MappingProxyType
+import math
+import orjson
+
+# Task builders, one per level type. Fixed option/requirement lists are
+# shared tuples; only the skill-specific strings are built per call.
+
+_MCQ_OPTIONS = (
+    "Option A (to be filled)",
+    "Option B (to be filled)",
+    "Option C (to be filled)",
+    "Option D (to be filled)"
+)
+_QUIZ_OPTIONS = ("A", "B", "C", "D")
+_BOSS_REQUIREMENTS = (
+    "Demonstrate mastery",
+    "Include all sub-concepts",
+    "Professional quality",
+    "Deploy live"
+)
+
+def _build_basics_task(skill_name: str) -> Dict:
+    return {
+        "type": "mcq",
+        "question": f"What is the main purpose of {skill_name}?",
+        "options": _MCQ_OPTIONS,
+        "correct_answer": _MCQ_OPTIONS[0],
+        "hint": "Review the first resource"
+    }
+
+def _build_concept_task(skill_name: str) -> Dict:
+    return {
+        "type": "code",
+        "question": f"Write a simple example using {skill_name}",
+        "starter_code": "// Your code here",
+        "expected_output": "Basic functionality",
+        "hint": "Start with the simplest example"
+    }
+
+def _build_practice_task(skill_name: str) -> Dict:
+    return {
+        "type": "project",
+        "question": f"Build a mini project with {skill_name}",
+        "requirements": [
+            f"Use {skill_name} correctly",
+            "Make it functional",
+            "Add basic styling"
+        ],
+        "submission_type": "codepen_link"
+    }
+
+def _build_challenge_task(skill_name: str) -> Dict:
+    return {
+        "type": "quiz",
+        "questions": [
+            {
+                "question": f"Question about {skill_name}",
+                "options": _QUIZ_OPTIONS,
+                "correct_answer": "A"
+            }
+        ],
+        "passing_score": 80
+    }
+
+def _build_boss_task(skill_name: str) -> Dict:
+    return {
+        "type": "boss_project",
+        "question": f"Build a complete project showcasing {skill_name}",
+        "requirements": _BOSS_REQUIREMENTS,
+        "submission_type": "github_repo",
+        "review_required": True
+    }
+
+_TASK_BUILDERS = {
+    "basics": _build_basics_task,
+    "concept": _build_concept_task,
+    "practice": _build_practice_task,
+    "challenge": _build_challenge_task,
+    "boss": _build_boss_task
+}
+
 
 class LevelGenerator:
     """Generate game-like levels from skill templates"""
@@ -21,13 +102,53 @@ class LevelGenerator:
     
     # Icons for each type
     LEVEL_ICONS = {
-        "basics": ["🌱", "📖", "🔰", "💡"],
-        "concept": ["🎨", "🧩", "⚙️", "🔬"],
-        "practice": ["💼", "🛠️", "⚡", "🎯"],
-        "challenge": ["🧠", "🎮", "⚔️", "🏃"],
-        "boss": ["👑", "🏆", "💎", "🦸"]
+        "basics": ("🌱", "📖", "🔰", "💡"),
+        "concept": ("🎨", "🧩", "⚙️", "🔬"),
+        "practice": ("💼", "🛠️", "⚡", "🎯"),
+        "challenge": ("🧠", "🎮", "⚔️", "🏃"),
+        "boss": ("👑", "🏆", "💎", "🦸")
     }
     
+    # Milestone badges, one per 5-level block
+    _MILESTONE_BADGES = ("🌟", "⭐", "💫", "✨", "🌠")
+    
+    # Per-type presentation and reward settings, looked up once per level.
+    # Read-only so the shared class-level table cannot be mutated per request.
+    LEVEL_SPEC = MappingProxyType({
+        "basics": MappingProxyType({
+            "title_fmt": "Intro to {name}",
+            "goal_fmt": "Learn the fundamentals of {name}",
+            "xp": 100,
+            "minutes_mult": 1
+        }),
+        "concept": MappingProxyType({
+            "title_fmt": "Understanding {name}",
+            "goal_fmt": "Understand how {name} works",
+            "xp": 150,
+            "minutes_mult": 1
+        }),
+        "practice": MappingProxyType({
+            "title_fmt": "Build with {name}",
+            "goal_fmt": "Build something with {name}",
+            "xp": 200,
+            "minutes_mult": 1
+        }),
+        "challenge": MappingProxyType({
+            "title_fmt": "Quick {name} Quiz",
+            "goal_fmt": "Test your {name} knowledge",
+            "xp": 100,
+            "minutes_mult": 1
+        }),
+        "boss": MappingProxyType({
+            "title_fmt": "🏆 BOSS: {name} Challenge",
+            "goal_fmt": "Complete a real project using {name}",
+            "xp": 500,
+            "minutes_mult": 2,
+            "badge_fmt": "{name} Master 🏆",
+            "description": "Your major project milestone!"
+        })
+    })
+    
     # Task templates
     TASK_TEMPLATES = {
         "mcq": {
@@ -50,29 +171,22 @@ class LevelGenerator:
         }
     }
     
-    def __init__(self):
-        self.level_positions = self._generate_path_positions(20)
+    # Zigzag path like Candy Crush: x repeats center/left/right/center and y
+    # climbs 5 units per level, wrapping every TRACK_LENGTH levels
+    _X_CYCLE = (50, 30, 70, 50)
+    TRACK_LENGTH = 20
     
-    def _generate_path_positions(self, total_levels: int) -> List[Dict[str, int]]:
-        """Generate zigzag path positions like Candy Crush"""
-        positions = []
-        y_step = 100 / total_levels
-        
-        for i in range(total_levels):
-            # Zigzag pattern
-            if i % 4 == 0:
-                x = 50  # Center
-            elif i % 4 == 1:
-                x = 30  # Left
-            elif i % 4 == 2:
-                x = 70  # Right
-            else:
-                x = 50  # Center
-            
-            y = i * y_step + 10
-            positions.append({"x": x, "y": int(y)})
-        
-        return positions
+    def __init__(self):
+        # (level_type, icon) repeats every lcm(5, 4) = 20 levels, so precompute one period
+        period = math.lcm(
+            len(self.LEVEL_PATTERN),
+            *(len(icons) for icons in self.LEVEL_ICONS.values())
+        )
+        self._type_icon_cycle = []
+        for i in range(period):
+            level_type = self.LEVEL_PATTERN[i % len(self.LEVEL_PATTERN)]
+            icons = self.LEVEL_ICONS[level_type]
+            self._type_icon_cycle.append((level_type, icons[i % len(icons)]))
     
     def convert_skills_to_levels(
         self, 
@@ -110,47 +224,31 @@ class LevelGenerator:
             # Determine how many levels for this skill
             num_levels = max(1, int(levels_per_skill))
             
+            # Skill name and its URL-safe form, shared by every level of this skill
+            name = skill['name']
+            encoded = quote_plus(name)
+            
             for sub_level in range(num_levels):
-                # Determine level type (cycle through pattern)
-                level_type_index = (level_number - 1) % len(self.LEVEL_PATTERN)
-                level_type = self.LEVEL_PATTERN[level_type_index]
-                
-                # Get icon for this type
-                icon_index = (level_number - 1) % len(self.LEVEL_ICONS[level_type])
-                icon = self.LEVEL_ICONS[level_type][icon_index]
+                # Level type and icon (cycle through pattern)
+                level_type, icon = self._type_icon_cycle[(level_number - 1) % len(self._type_icon_cycle)]
                 
-                # Generate level title
-                if level_type == "boss":
-                    title = f"🏆 BOSS: {skill['name']} Challenge"
-                elif level_type == "challenge":
-                    title = f"Quick {skill['name']} Quiz"
-                elif level_type == "practice":
-                    title = f"Build with {skill['name']}"
-                elif level_type == "concept":
-                    title = f"Understanding {skill['name']}"
-                else:  # basics
-                    title = f"Intro to {skill['name']}"
+                spec = self.LEVEL_SPEC[level_type]
                 
-                # Simplify goal (one line only)
-                goal = self._simplify_goal(skill['name'], level_type)
+                # Level title and one-line goal
+                title = spec["title_fmt"].format(name=name)
+                goal = spec["goal_fmt"].format(name=name)
                 
                 # Get position
-                position = self.level_positions[min(level_number - 1, len(self.level_positions) - 1)]
+                position = {
+                    "x": self._X_CYCLE[(level_number - 1) & 3],
+                    "y": ((level_number - 1) % self.TRACK_LENGTH) * 5 + 10
+                }
                 
                 # Generate resources (1-2 only)
-                resources = self._generate_resources(skill['name'], level_type)
+                resources = self._generate_resources(name, encoded, level_type)
                 
                 # Generate task
-                task = self._generate_task(skill['name'], level_type)
-                
-                # Calculate XP reward
-                xp_reward = {
-                    "basics": 100,
-                    "concept": 150,
-                    "practice": 200,
-                    "challenge": 100,
-                    "boss": 500
-                }[level_type]
+                task = self._generate_task(name, level_type)
                 
                 # Determine initial status
                 if level_number == 1:
@@ -165,18 +263,18 @@ class LevelGenerator:
                     "status": status,
                     "icon": icon,
                     "position": position,
-                    "estimated_minutes": time_per_level if level_type != "boss" else time_per_level * 2,
+                    "estimated_minutes": time_per_level * spec["minutes_mult"],
                     "goal": goal,
                     "resources": resources,
                     "task": task,
-                    "xp_reward": xp_reward,
+                    "xp_reward": spec["xp"],
                     "completed_at": None
                 }
                 
                 # Add boss-specific fields
-                if level_type == "boss":
-                    level["badge_earned"] = f"{skill['name']} Master 🏆"
-                    level["description"] = "Your major project milestone!"
+                if "badge_fmt" in spec:
+                    level["badge_earned"] = spec["badge_fmt"].format(name=name)
+                    level["description"] = spec["description"]
                 
                 levels.append(level)
                 level_number += 1
@@ -206,39 +304,28 @@ class LevelGenerator:
             }
         }
     
-    def _simplify_goal(self, skill_name: str, level_type: str) -> str:
-        """Generate one-line goal based on level type"""
-        templates = {
-            "basics": f"Learn the fundamentals of {skill_name}",
-            "concept": f"Understand how {skill_name} works",
-            "practice": f"Build something with {skill_name}",
-            "challenge": f"Test your {skill_name} knowledge",
-            "boss": f"Complete a real project using {skill_name}"
-        }
-        return templates[level_type]
-    
-    def _generate_resources(self, skill_name: str, level_type: str) -> List[Dict]:
-        """Generate 1-2 learning resources"""
+    def _generate_resources(self, skill_name: str, encoded: str, level_type: str) -> List[Dict]:
+        """Generate 1-2 learning resources (encoded is the quote_plus'd skill name)"""
         resources = []
         
         if level_type in ["basics", "concept"]:
             resources.append({
                 "type": "video",
                 "title": f"{skill_name} Explained in 10 Minutes",
-                "url": f"https://youtube.com/search?q={skill_name.replace(' ', '+')}+tutorial",
+                "url": f"https://youtube.com/search?q={encoded}+tutorial",
                 "duration": "10 min"
             })
             resources.append({
                 "type": "article",
                 "title": f"{skill_name} Cheatsheet",
-                "url": f"https://google.com/search?q={skill_name.replace(' ', '+')}+cheatsheet",
+                "url": f"https://google.com/search?q={encoded}+cheatsheet",
                 "duration": "5 min read"
             })
         elif level_type == "practice":
             resources.append({
                 "type": "interactive",
                 "title": f"{skill_name} Playground",
-                "url": f"https://codepen.io/search/pens?q={skill_name.replace(' ', '+')}",
+                "url": f"https://codepen.io/search/pens?q={encoded}",
                 "duration": "Hands-on"
             })
         
@@ -246,67 +333,7 @@ class LevelGenerator:
     
     def _generate_task(self, skill_name: str, level_type: str) -> Dict:
         """Generate appropriate task for level type"""
-        if level_type == "basics":
-            return {
-                "type": "mcq",
-                "question": f"What is the main purpose of {skill_name}?",
-                "options": [
-                    "Option A (to be filled)",
-                    "Option B (to be filled)",
-                    "Option C (to be filled)",
-                    "Option D (to be filled)"
-                ],
-                "correct_answer": "Option A (to be filled)",
-                "hint": "Review the first resource"
-            }
-        
-        elif level_type == "concept":
-            return {
-                "type": "code",
-                "question": f"Write a simple example using {skill_name}",
-                "starter_code": "// Your code here",
-                "expected_output": "Basic functionality",
-                "hint": "Start with the simplest example"
-            }
-        
-        elif level_type == "practice":
-            return {
-                "type": "project",
-                "question": f"Build a mini project with {skill_name}",
-                "requirements": [
-                    f"Use {skill_name} correctly",
-                    "Make it functional",
-                    "Add basic styling"
-                ],
-                "submission_type": "codepen_link"
-            }
-        
-        elif level_type == "challenge":
-            return {
-                "type": "quiz",
-                "questions": [
-                    {
-                        "question": f"Question about {skill_name}",
-                        "options": ["A", "B", "C", "D"],
-                        "correct_answer": "A"
-                    }
-                ],
-                "passing_score": 80
-            }
-        
-        else:  # boss
-            return {
-                "type": "boss_project",
-                "question": f"Build a complete project showcasing {skill_name}",
-                "requirements": [
-                    "Demonstrate mastery",
-                    "Include all sub-concepts",
-                    "Professional quality",
-                    "Deploy live"
-                ],
-                "submission_type": "github_repo",
-                "review_required": True
-            }
+        return _TASK_BUILDERS[level_type](skill_name)
     
     def _generate_milestones(self, levels: List[Dict], career_goal: str) -> List[Dict]:
         """Generate milestone badges every 5 levels"""
@@ -325,7 +352,7 @@ class LevelGenerator:
                 milestones.append({
                     "level": i + 5,
                     "title": milestone_names[i // 5],
-                    "badge": ["🌟", "⭐", "💫", "✨", "🌠"][i // 5 % 5],
+                    "badge": self._MILESTONE_BADGES[i // 5 % 5],
                     "description": f"Reached level {i + 5}!"
                 })
         
@@ -367,5 +394,5 @@ if __name__ == "__main__":
     result = generate_level_roadmap(sample_skills, "Web Developer", "Beginner")
     
     # Print result
-    print(json.dumps(result, indent=2))
+    print(orjson.dumps(result, option=orjson.OPT_INDENT_2).decode())
     print(f"\n✅ Generated {len(result['levels'])} levels!")
\ No newline at end of file
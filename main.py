@@ -1,10 +1,15 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from level_generator import generate_level_roadmap
 from datetime import timedelta
-import json
-from config import GROQ_API_KEY
+import asyncio
+import hashlib
+import logging
+import orjson
+import requests
+from config import CORS_ORIGINS, CORS_ORIGIN_REGEX, CORS_MAX_AGE
 
 from database import Database
 from models import *
@@ -15,23 +20,33 @@ from auth import (
     get_current_user,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
-from config import get_available_career_goals, get_roadmap_template
+from config import get_available_career_goals, get_roadmap_template, is_valid_career_goal
 from ai_service import ai_service
+from cache import TTLCache
+
+logging.basicConfig(
+    level=logging.WARNING,
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+log = logging.getLogger(__name__)
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Learning Roadmap Tracker API",
     description="API for personalized learning roadmap generation and tracking",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware for frontend integration
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # In production, specify exact origins
+    allow_origins=CORS_ORIGINS,
+    allow_origin_regex=CORS_ORIGIN_REGEX,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=("GET", "POST", "PATCH"),
+    allow_headers=("authorization", "content-type"),
+    max_age=CORS_MAX_AGE,
 )
 
 # Database instance
@@ -56,12 +71,16 @@ def root():
 @app.get("/admin/users")
 def get_all_users():
     """Get all registered users (Admin only)"""
-    conn = db.get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, username, email, created_at FROM users")
-    users = [dict(row) for row in cursor.fetchall()]
-    conn.close()
-    return {"users": users}
+    with db.connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = None  # plain tuples; this cursor only, the pooled connection keeps sqlite3.Row
+        cursor.execute("SELECT id, username, email, created_at FROM users")
+        users = [
+            {"id": user_id, "username": username, "email": email, "created_at": created_at}
+            for user_id, username, email, created_at in cursor
+        ]
+    
+    return ORJSONResponse({"users": users})
 # ============ AUTH ENDPOINTS ============
 
 @app.post("/auth/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
@@ -79,7 +98,7 @@ def register(user_data: UserRegister):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Register error: {str(e)}")
+        log.exception("Register error")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Registration failed: {str(e)}"
@@ -117,87 +136,193 @@ def get_me(current_user: dict = Depends(get_current_user)):
 
 # ============ CAREER GOALS ENDPOINT ============
 
+# The goal list only changes on redeploy, so the body and its ETag are built once
+_CAREER_GOALS_BODY = orjson.dumps({
+    "career_goals": get_available_career_goals(),
+    "learning_levels": ["Beginner", "Intermediate"]
+})
+_CAREER_GOALS_HEADERS = {
+    "ETag": f'"{hashlib.sha1(_CAREER_GOALS_BODY).hexdigest()}"',
+    "Cache-Control": "public, max-age=3600"
+}
+
 @app.get("/career-goals")
-def get_career_goals():
-    """Get available career goals"""
-    return {
-        "career_goals": get_available_career_goals(),
-        "learning_levels": ["Beginner", "Intermediate"]
-    }
+def get_career_goals(request: Request):
+    """Get available career goals (answers 304 when the client's copy is current)"""
+    if request.headers.get("if-none-match") == _CAREER_GOALS_HEADERS["ETag"]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=_CAREER_GOALS_HEADERS)
+    
+    return Response(
+        content=_CAREER_GOALS_BODY,
+        media_type="application/json",
+        headers=_CAREER_GOALS_HEADERS
+    )
 
 # ============ HELPER FUNCTION FOR ROADMAP RETRIEVAL ============
 
-def _get_user_roadmaps(user_id: int):
-    """Helper function to get all roadmaps for a user (without dependency injection)"""
+def _finish_roadmap(roadmap: dict, completed: int) -> dict:
+    """Fill in progress; roadmaps with nothing completed keep the 0.0 default"""
+    if completed:
+        roadmap["progress_percentage"] = round(completed / len(roadmap["skills"]) * 100, 2)
+    return roadmap
+
+def _iter_user_roadmaps(user_id: int):
+    """Yield a user's roadmaps (newest first), built from a single query"""
     
-    conn = db.get_connection()
-    cursor = conn.cursor()
+    with db.connection() as conn:
+        cursor = conn.cursor()
+        
+        # One query for all roadmaps and their skills; level-based roadmaps have
+        # no skills, so they come back as a single row with NULL skill columns.
+        # Rows arrive grouped by roadmap, so each one is complete once the id changes
+        cursor.execute("""
+            SELECT r.id, r.user_id, r.career_goal, r.learning_level, r.existing_skills, r.created_at,
+                   s.id AS skill_id, s.skill_name, s.learning_stage, s.order_index,
+                   s.why_important, s.estimated_hours, ss.status, ss.id AS status_id
+            FROM roadmaps r
+            LEFT JOIN (skills s JOIN skill_status ss ON s.id = ss.skill_id)
+                ON s.roadmap_id = r.id
+            WHERE r.user_id = ?
+            ORDER BY r.created_at DESC, r.id DESC, s.order_index
+        """, (user_id,))
+        
+        # Read everything before yielding: the pooled connection must not stay
+        # checked out while a streaming client consumes the roadmaps
+        rows = cursor.fetchall()
     
-    cursor.execute(
-        "SELECT * FROM roadmaps WHERE user_id = ? ORDER BY created_at DESC",
-        (user_id,)
-    )
-    roadmaps = cursor.fetchall()
+    roadmap = None
+    completed = 0
     
-    result = []
+    for row in rows:
+        if roadmap is None or row["id"] != roadmap["id"]:
+            if roadmap is not None:
+                yield _finish_roadmap(roadmap, completed)
+            
+            roadmap = {
+                "id": row["id"],
+                "user_id": row["user_id"],
+                "career_goal": row["career_goal"],
+                "learning_level": row["learning_level"],
+                "existing_skills": orjson.loads(row["existing_skills"]),
+                "created_at": row["created_at"],
+                "skills": [],
+                "progress_percentage": 0.0
+            }
+            completed = 0
+        
+        if row["skill_id"] is None:
+            continue
+        
+        roadmap["skills"].append({
+            "id": row["skill_id"],
+            "skill_name": row["skill_name"],
+            "learning_stage": row["learning_stage"],
+            "order_index": row["order_index"],
+            "why_important": row["why_important"],
+            "estimated_hours": row["estimated_hours"],
+            "status": row["status"],
+            "status_id": row["status_id"]
+        })
+        
+        if row["status"] == "COMPLETED":
+            completed += 1
     
-    for roadmap in roadmaps:
-        # Get skills with status
-        cursor.execute("""
-            SELECT s.*, ss.status, ss.id as status_id
-            FROM skills s
-            JOIN skill_status ss ON s.id = ss.skill_id
-            WHERE s.roadmap_id = ?
-            ORDER BY s.order_index
-        """, (roadmap["id"],))
+    if roadmap is not None:
+        yield _finish_roadmap(roadmap, completed)
+
+def _get_user_roadmaps(user_id: int):
+    """Helper function to get all roadmaps for a user (without dependency injection)"""
+    return list(_iter_user_roadmaps(user_id))
+
+def _stream_user_roadmaps(user_id: int):
+    """Encode a user's roadmaps as a JSON array, one roadmap per chunk"""
+    separator = b"["
+    for roadmap in _iter_user_roadmaps(user_id):
+        yield separator + orjson.dumps(roadmap)
+        separator = b","
+    yield b"[]" if separator == b"[" else b"]"
+
+# ============ ROADMAP ENDPOINTS ============
+
+def _insert_roadmap(user_id: int, roadmap_data: RoadmapCreate, skills_template, explanations: dict):
+    """Write a roadmap with its skills and statuses in one transaction; returns (roadmap row, skills)"""
+    with db.connection() as conn:
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            """INSERT INTO roadmaps (user_id, career_goal, learning_level, existing_skills) 
+               VALUES (?, ?, ?, ?)""",
+            (
+                user_id,
+                roadmap_data.career_goal,
+                roadmap_data.learning_level,
+                orjson.dumps(roadmap_data.existing_skills or []).decode()
+            )
+        )
+        roadmap_id = cursor.lastrowid
+        
+        cursor.executemany(
+            """INSERT INTO skills 
+               (roadmap_id, skill_name, learning_stage, order_index, why_important, estimated_hours)
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            [
+                (
+                    roadmap_id,
+                    skill["name"],
+                    skill["stage"],
+                    idx,
+                    explanations.get(skill["name"], ""),
+                    skill.get("hours", None)
+                )
+                for idx, skill in enumerate(skills_template)
+            ]
+        )
         
-        skills = cursor.fetchall()
+        # Create initial skill statuses
+        cursor.execute(
+            """INSERT INTO skill_status (skill_id, status)
+               SELECT id, 'NOT_STARTED' FROM skills WHERE roadmap_id = ?""",
+            (roadmap_id,)
+        )
+        
+        cursor.execute(
+            """SELECT s.id, ss.id AS status_id
+               FROM skills s
+               JOIN skill_status ss ON ss.skill_id = s.id
+               WHERE s.roadmap_id = ?
+               ORDER BY s.order_index""",
+            (roadmap_id,)
+        )
         
         skills_data = [
             {
-                "id": skill["id"],
-                "skill_name": skill["skill_name"],
-                "learning_stage": skill["learning_stage"],
-                "order_index": skill["order_index"],
-                "why_important": skill["why_important"],
-                "estimated_hours": skill["estimated_hours"],
-                "status": skill["status"],
-                "status_id": skill["status_id"]
+                "id": row["id"],
+                "skill_name": skill["name"],
+                "learning_stage": skill["stage"],
+                "order_index": idx,
+                "why_important": explanations.get(skill["name"], ""),
+                "estimated_hours": skill.get("hours", None),
+                "status": "NOT_STARTED",
+                "status_id": row["status_id"]
             }
-            for skill in skills
+            for idx, (skill, row) in enumerate(zip(skills_template, cursor.fetchall()))
         ]
         
-        # Calculate progress
-        total = len(skills_data)
-        completed = sum(1 for s in skills_data if s["status"] == "COMPLETED")
-        progress = (completed / total * 100) if total > 0 else 0
-        
-        result.append({
-            "id": roadmap["id"],
-            "user_id": roadmap["user_id"],
-            "career_goal": roadmap["career_goal"],
-            "learning_level": roadmap["learning_level"],
-            "existing_skills": json.loads(roadmap["existing_skills"]),
-            "created_at": roadmap["created_at"],
-            "skills": skills_data,
-            "progress_percentage": round(progress, 2)
-        })
-    
-    conn.close()
+        # Fetch created roadmap
+        cursor.execute("SELECT * FROM roadmaps WHERE id = ?", (roadmap_id,))
+        roadmap = cursor.fetchone()
     
-    return result
-
-# ============ ROADMAP ENDPOINTS ============
+    return roadmap, skills_data
 
 @app.post("/roadmaps/create", response_model=RoadmapResponse, status_code=status.HTTP_201_CREATED)
-def create_roadmap(
+async def create_roadmap(
     roadmap_data: RoadmapCreate,
     current_user: dict = Depends(get_current_user)
 ):
     """Create a new learning roadmap"""
     
     # Validate career goal
-    if roadmap_data.career_goal not in get_available_career_goals():
+    if not is_valid_career_goal(roadmap_data.career_goal):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Invalid career goal. Choose from: {get_available_career_goals()}"
@@ -215,91 +340,40 @@ def create_roadmap(
             detail="Invalid learning level"
         )
     
-    conn = db.get_connection()
-    cursor = conn.cursor()
-    
-    # Create roadmap
-    cursor.execute(
-        """INSERT INTO roadmaps (user_id, career_goal, learning_level, existing_skills) 
-           VALUES (?, ?, ?, ?)""",
-        (
-            current_user["id"],
-            roadmap_data.career_goal,
-            roadmap_data.learning_level,
-            json.dumps(roadmap_data.existing_skills or [])
-        )
+    # Explanations come first so the roadmap and its skills can be written in a
+    # single short transaction: no write lock is held across the network calls,
+    # and readers never see a roadmap without its skills
+    log.info("Generating AI explanations for %d skills", len(skills_template))
+    explanations = await ai_service.generate_batch_explanations(
+        skills_template, roadmap_data.career_goal
     )
     
-    roadmap_id = cursor.lastrowid
-    
-    # Generate AI explanations (in background for demo, can be async)
-    print(f"🤖 Generating AI explanations for {len(skills_template)} skills...")
-    explanations = ai_service.generate_batch_explanations(
-        skills_template, 
-        roadmap_data.career_goal
+    roadmap, skills_data = await asyncio.to_thread(
+        _insert_roadmap, current_user["id"], roadmap_data, skills_template, explanations
     )
     
-    # Insert skills
-    skills_data = []
-    for idx, skill in enumerate(skills_template):
-        cursor.execute(
-            """INSERT INTO skills 
-               (roadmap_id, skill_name, learning_stage, order_index, why_important, estimated_hours)
-               VALUES (?, ?, ?, ?, ?, ?)""",
-            (
-                roadmap_id,
-                skill["name"],
-                skill["stage"],
-                idx,
-                explanations.get(skill["name"], ""),
-                skill.get("hours", None)
-            )
-        )
-        
-        skill_id = cursor.lastrowid
-        
-        # Create initial skill status
-        cursor.execute(
-            "INSERT INTO skill_status (skill_id, status) VALUES (?, 'NOT_STARTED')",
-            (skill_id,)
-        )
-        
-        status_id = cursor.lastrowid
-        
-        skills_data.append({
-            "id": skill_id,
-            "skill_name": skill["name"],
-            "learning_stage": skill["stage"],
-            "order_index": idx,
-            "why_important": explanations.get(skill["name"], ""),
-            "estimated_hours": skill.get("hours", None),
-            "status": "NOT_STARTED",
-            "status_id": status_id
-        })
-    
-    conn.commit()
-    
-    # Fetch created roadmap
-    cursor.execute("SELECT * FROM roadmaps WHERE id = ?", (roadmap_id,))
-    roadmap = cursor.fetchone()
-    
-    conn.close()
+    # The AI tutor prompt is built from the latest roadmap
+    _CHAT_PROMPT_CACHE.pop(current_user["id"])
     
     return {
         "id": roadmap["id"],
         "user_id": roadmap["user_id"],
         "career_goal": roadmap["career_goal"],
         "learning_level": roadmap["learning_level"],
-        "existing_skills": json.loads(roadmap["existing_skills"]),
+        "existing_skills": orjson.loads(roadmap["existing_skills"]),
         "created_at": roadmap["created_at"],
         "skills": skills_data,
         "progress_percentage": 0.0
     }
 
-@app.get("/roadmaps/my-roadmaps", response_model=List[RoadmapResponse])
+# Read-heavy endpoints return their response directly to skip response_model
+# validation; the models are still listed under `responses` for the docs
+
+@app.get("/roadmaps/my-roadmaps", responses={200: {"model": List[RoadmapResponse]}})
 def get_my_roadmaps(current_user: dict = Depends(get_current_user)):
     """Get all roadmaps for current user"""
-    return _get_user_roadmaps(current_user["id"])
+    # Streamed so the first roadmap goes out before the rest are read
+    return StreamingResponse(_stream_user_roadmaps(current_user["id"]), media_type="application/json")
 
 # ============ SKILL STATUS ENDPOINTS ============
 
@@ -311,47 +385,36 @@ def update_skill_status(
 ):
     """Update skill completion status"""
     
-    conn = db.get_connection()
-    cursor = conn.cursor()
-    
-    # Verify ownership
-    cursor.execute("""
-        SELECT ss.*, s.roadmap_id, r.user_id
-        FROM skill_status ss
-        JOIN skills s ON ss.skill_id = s.id
-        JOIN roadmaps r ON s.roadmap_id = r.id
-        WHERE ss.id = ?
-    """, (skill_status_id,))
-    
-    skill_status = cursor.fetchone()
-    
-    if not skill_status:
-        conn.close()
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Skill status not found"
-        )
-    
-    if skill_status["user_id"] != current_user["id"]:
-        conn.close()
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to update this skill"
-        )
-    
-    # Update status
-    cursor.execute(
-        "UPDATE skill_status SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
-        (status_update.status, skill_status_id)
-    )
-    
-    conn.commit()
-    
-    # Fetch updated status
-    cursor.execute("SELECT * FROM skill_status WHERE id = ?", (skill_status_id,))
-    updated_status = cursor.fetchone()
-    
-    conn.close()
+    with db.connection() as conn:
+        cursor = conn.cursor()
+        
+        # Update only if the skill belongs to one of the user's roadmaps
+        updated_status = cursor.execute("""
+            UPDATE skill_status SET status = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE id = ? AND skill_id IN (
+                SELECT s.id FROM skills s
+                JOIN roadmaps r ON s.roadmap_id = r.id
+                WHERE r.user_id = ?
+            )
+            RETURNING id, skill_id, status, updated_at
+        """, (status_update.status, skill_status_id, current_user["id"])).fetchone()
+        
+        if updated_status is None:
+            # Nothing updated: tell a missing status apart from someone else's
+            exists = cursor.execute(
+                "SELECT 1 FROM skill_status WHERE id = ?", (skill_status_id,)
+            ).fetchone()
+            
+            if not exists:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Skill status not found"
+                )
+            
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized to update this skill"
+            )
     
     return {
         "id": updated_status["id"],
@@ -362,25 +425,27 @@ def update_skill_status(
 
 # ============ DASHBOARD ENDPOINT ============
 
-@app.get("/dashboard", response_model=DashboardResponse)
-def get_dashboard(current_user: dict = Depends(get_current_user)):
-    """Get complete dashboard data"""
+@app.get("/dashboard", responses={200: {"model": DashboardResponse}})
+def get_dashboard(
+    include_skills: bool = True,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get complete dashboard data
+    Pass include_skills=false to get only the totals (roadmaps comes back empty)
+    """
     
-    roadmaps = _get_user_roadmaps(current_user["id"])
+    roadmaps = _get_user_roadmaps(current_user["id"]) if include_skills else []
     
-    total_skills = sum(len(r["skills"]) for r in roadmaps)
-    completed_skills = sum(
-        sum(1 for s in r["skills"] if s["status"] == "COMPLETED") 
-        for r in roadmaps
-    )
-    in_progress_skills = sum(
-        sum(1 for s in r["skills"] if s["status"] == "IN_PROGRESS") 
-        for r in roadmaps
-    )
+    # Totals come straight from SQL instead of re-walking every roadmap's skills
+    skill_counts = db.get_user_skill_counts(current_user["id"])
+    total_skills = sum(skill_counts.values())
+    completed_skills = skill_counts.get("COMPLETED", 0)
+    in_progress_skills = skill_counts.get("IN_PROGRESS", 0)
     
-    overall_progress = (completed_skills / total_skills * 100) if total_skills > 0 else 0
+    overall_progress = round(completed_skills / total_skills * 100, 2) if completed_skills else 0.0
     
-    return {
+    return ORJSONResponse({
         "user": {
             "id": current_user["id"],
             "username": current_user["username"],
@@ -391,8 +456,8 @@ def get_dashboard(current_user: dict = Depends(get_current_user)):
         "total_skills": total_skills,
         "completed_skills": completed_skills,
         "in_progress_skills": in_progress_skills,
-        "overall_progress": round(overall_progress, 2)
-    }
+        "overall_progress": overall_progress
+    })
 
 @app.post("/roadmaps/create-levels", status_code=status.HTTP_201_CREATED)
 def create_level_roadmap(
@@ -405,7 +470,7 @@ def create_level_roadmap(
     """
     
     # Validate career goal
-    if roadmap_data.career_goal not in get_available_career_goals():
+    if not is_valid_career_goal(roadmap_data.career_goal):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Invalid career goal. Choose from: {get_available_career_goals()}"
@@ -423,7 +488,7 @@ def create_level_roadmap(
             detail="Invalid learning level"
         )
     
-    print(f"🎮 Generating level-based roadmap for {roadmap_data.career_goal}...")
+    log.info("Generating level-based roadmap for %s", roadmap_data.career_goal)
     
     # Convert skills to levels using our generator
     level_roadmap = generate_level_roadmap(
@@ -432,27 +497,27 @@ def create_level_roadmap(
         roadmap_data.learning_level
     )
     
-    conn = db.get_connection()
-    cursor = conn.cursor()
-    
-    # Create roadmap entry with metadata
-    cursor.execute(
-        """INSERT INTO roadmaps (user_id, career_goal, learning_level, existing_skills, metadata) 
-           VALUES (?, ?, ?, ?, ?)""",
-        (
-            current_user["id"],
-            roadmap_data.career_goal,
-            roadmap_data.learning_level,
-            json.dumps(roadmap_data.existing_skills or []),
-            json.dumps(level_roadmap)  # Store entire level structure as JSON
+    with db.connection() as conn:
+        cursor = conn.cursor()
+        
+        # Create roadmap entry with metadata
+        cursor.execute(
+            """INSERT INTO roadmaps (user_id, career_goal, learning_level, existing_skills, metadata) 
+               VALUES (?, ?, ?, ?, ?)""",
+            (
+                current_user["id"],
+                roadmap_data.career_goal,
+                roadmap_data.learning_level,
+                orjson.dumps(roadmap_data.existing_skills or []).decode(),
+                orjson.dumps(level_roadmap).decode()  # Store entire level structure as JSON
+            )
         )
-    )
-    
-    roadmap_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
+        
+        roadmap_id = cursor.lastrowid
     
-    print(f"✅ Level roadmap created! ID: {roadmap_id}, Total levels: {len(level_roadmap['levels'])}")
+    # The AI tutor prompt is built from the latest roadmap
+    _CHAT_PROMPT_CACHE.pop(current_user["id"])
+    log.info("Level roadmap created: id=%s, levels=%d", roadmap_id, len(level_roadmap["levels"]))
     
     return {
         "roadmap_id": roadmap_id,
@@ -472,59 +537,52 @@ def get_roadmap_levels(
     This endpoint returns the game-like level structure
     """
     
-    conn = db.get_connection()
-    cursor = conn.cursor()
-    
-    # Get roadmap
-    cursor.execute(
-        "SELECT * FROM roadmaps WHERE id = ? AND user_id = ?",
-        (roadmap_id, current_user["id"])
-    )
-    roadmap = cursor.fetchone()
-    
-    if not roadmap:
-        conn.close()
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Roadmap not found"
+    with db.connection() as conn:
+        cursor = conn.cursor()
+        
+        # Get roadmap
+        cursor.execute(
+            "SELECT * FROM roadmaps WHERE id = ? AND user_id = ?",
+            (roadmap_id, current_user["id"])
         )
-    
-    # Check if this is a level-based roadmap
-    if not roadmap["metadata"]:
-        conn.close()
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="This is not a level-based roadmap. Use /roadmaps/my-roadmaps instead."
+        roadmap = cursor.fetchone()
+        
+        if not roadmap:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Roadmap not found"
+            )
+        
+        # Check if this is a level-based roadmap
+        if not roadmap["metadata"]:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="This is not a level-based roadmap. Use /roadmaps/my-roadmaps instead."
+            )
+        
+        # Parse level data from metadata
+        level_data = orjson.loads(roadmap["metadata"])
+        
+        # Completed levels plus XP/time totals, aggregated by SQL in the same query
+        cursor.execute(
+            """SELECT level_number, completed_at,
+                      SUM(xp_earned) OVER () AS total_xp,
+                      SUM(time_spent_minutes) OVER () AS total_time
+               FROM level_progress 
+               WHERE roadmap_id = ?
+               ORDER BY level_number""",
+            (roadmap_id,)
         )
+        progress_records = cursor.fetchall()
     
-    # Parse level data from metadata
-    level_data = json.loads(roadmap["metadata"])
-    
-    # Get user progress from level_progress table
-    cursor.execute(
-        """SELECT level_number, completed_at, xp_earned, time_spent_minutes 
-           FROM level_progress 
-           WHERE roadmap_id = ?
-           ORDER BY level_number""",
-        (roadmap_id,)
-    )
-    progress_records = cursor.fetchall()
-    conn.close()
+    # level_number -> completed_at
+    completed_levels = {record["level_number"]: record["completed_at"] for record in progress_records}
     
-    # Build progress dictionary
-    completed_levels = {}
-    total_xp = 0
-    total_time = 0
-    
-    for record in progress_records:
-        level_num = record["level_number"]
-        completed_levels[level_num] = {
-            "completed_at": record["completed_at"],
-            "xp_earned": record["xp_earned"],
-            "time_spent": record["time_spent_minutes"]
-        }
-        total_xp += record["xp_earned"]
-        total_time += record["time_spent_minutes"]
+    if progress_records:
+        total_xp = progress_records[0]["total_xp"] or 0
+        total_time = progress_records[0]["total_time"] or 0
+    else:
+        total_xp = total_time = 0
     
     # Update level statuses based on progress
     current_level_number = len(completed_levels) + 1
@@ -534,7 +592,7 @@ def get_roadmap_levels(
         
         if level_num in completed_levels:
             level["status"] = "completed"
-            level["completed_at"] = completed_levels[level_num]["completed_at"]
+            level["completed_at"] = completed_levels[level_num]
         elif level_num == current_level_number:
             level["status"] = "unlocked"
         else:
@@ -558,7 +616,8 @@ def get_roadmap_levels(
         if (now - last_completion).days < 2:
             level_data["stats"]["current_streak"] = 1  # Simplified streak
     
-    return level_data
+    # Returned directly so the large level tree skips jsonable_encoder
+    return ORJSONResponse(level_data)
 
 
 @app.post("/roadmaps/{roadmap_id}/levels/{level_number}/complete")
@@ -572,68 +631,58 @@ def complete_level(
     This unlocks the next level and awards XP
     """
     
-    conn = db.get_connection()
-    cursor = conn.cursor()
-    
-    # Verify ownership
-    cursor.execute(
-        "SELECT * FROM roadmaps WHERE id = ? AND user_id = ?",
-        (roadmap_id, current_user["id"])
-    )
-    roadmap = cursor.fetchone()
-    
-    if not roadmap:
-        conn.close()
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized"
+    with db.connection() as conn:
+        cursor = conn.cursor()
+        
+        # Verify ownership
+        cursor.execute(
+            "SELECT * FROM roadmaps WHERE id = ? AND user_id = ?",
+            (roadmap_id, current_user["id"])
         )
-    
-    # Get level data
-    level_data = json.loads(roadmap["metadata"])
-    current_level = next(
-        (l for l in level_data["levels"] if l["level_number"] == level_number), 
-        None
-    )
-    
-    if not current_level:
-        conn.close()
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Level not found"
+        roadmap = cursor.fetchone()
+        
+        if not roadmap:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized"
+            )
+        
+        # Get level data
+        level_data = orjson.loads(roadmap["metadata"])
+        current_level = next(
+            (l for l in level_data["levels"] if l["level_number"] == level_number), 
+            None
+        )
+        
+        if not current_level:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Level not found"
+            )
+        
+        # Record completion; the UNIQUE(roadmap_id, level_number) constraint makes
+        # a repeat completion a no-op instead of a race between check and insert
+        xp_reward = current_level["xp_reward"]
+        
+        cursor.execute(
+            """INSERT INTO level_progress 
+               (roadmap_id, level_number, xp_earned, time_spent_minutes)
+               VALUES (?, ?, ?, ?)
+               ON CONFLICT(roadmap_id, level_number) DO NOTHING""",
+            (roadmap_id, level_number, xp_reward, current_level["estimated_minutes"])
+        )
+        
+        if cursor.rowcount == 0:
+            return {
+                "message": "Level already completed",
+                "xp_earned": 0
+            }
+        
+        # Update last_activity
+        cursor.execute(
+            "UPDATE roadmaps SET last_activity = CURRENT_TIMESTAMP WHERE id = ?",
+            (roadmap_id,)
         )
-    
-    # Check if level is already completed
-    cursor.execute(
-        "SELECT * FROM level_progress WHERE roadmap_id = ? AND level_number = ?",
-        (roadmap_id, level_number)
-    )
-    
-    if cursor.fetchone():
-        conn.close()
-        return {
-            "message": "Level already completed",
-            "xp_earned": 0
-        }
-    
-    # Record completion
-    xp_reward = current_level["xp_reward"]
-    
-    cursor.execute(
-        """INSERT INTO level_progress 
-           (roadmap_id, level_number, xp_earned, time_spent_minutes)
-           VALUES (?, ?, ?, ?)""",
-        (roadmap_id, level_number, xp_reward, current_level["estimated_minutes"])
-    )
-    
-    # Update last_activity
-    cursor.execute(
-        "UPDATE roadmaps SET last_activity = CURRENT_TIMESTAMP WHERE id = ?",
-        (roadmap_id,)
-    )
-    
-    conn.commit()
-    conn.close()
     
     # Check if it's a boss level (awards badge)
     badge = None
@@ -657,35 +706,33 @@ def get_dashboard_levels(current_user: dict = Depends(get_current_user)):
     Similar to /dashboard but returns level format
     """
     
-    conn = db.get_connection()
-    cursor = conn.cursor()
-    
-    # Get all user roadmaps
-    cursor.execute(
-        "SELECT * FROM roadmaps WHERE user_id = ? ORDER BY created_at DESC",
-        (current_user["id"],)
-    )
-    roadmaps = cursor.fetchall()
+    with db.connection() as conn:
+        cursor = conn.cursor()
+        
+        # Level roadmaps with their progress aggregated in one grouped query;
+        # total_levels is read from the metadata JSON without loading it
+        cursor.execute(
+            """SELECT r.id, r.career_goal, r.learning_level, r.created_at,
+                      json_extract(r.metadata, '$.roadmap.total_levels') AS total_levels,
+                      COUNT(lp.id) AS completed,
+                      COALESCE(SUM(lp.xp_earned), 0) AS xp
+               FROM roadmaps r
+               LEFT JOIN level_progress lp ON lp.roadmap_id = r.id
+               WHERE r.user_id = ? AND r.metadata IS NOT NULL AND r.metadata <> ''
+               GROUP BY r.id
+               ORDER BY r.created_at DESC""",
+            (current_user["id"],)
+        )
+        roadmaps = cursor.fetchall()
     
     result = []
     total_xp = 0
     total_levels_completed = 0
     
     for roadmap in roadmaps:
-        if not roadmap["metadata"]:
-            continue  # Skip old-style roadmaps
-        
-        level_data = json.loads(roadmap["metadata"])
-        
-        # Get progress for this roadmap
-        cursor.execute(
-            "SELECT COUNT(*) as completed, SUM(xp_earned) as xp FROM level_progress WHERE roadmap_id = ?",
-            (roadmap["id"],)
-        )
-        stats = cursor.fetchone()
-        
-        completed = stats["completed"] or 0
-        xp = stats["xp"] or 0
+        completed = roadmap["completed"]
+        xp = roadmap["xp"]
+        total_levels = roadmap["total_levels"]
         
         total_xp += xp
         total_levels_completed += completed
@@ -694,17 +741,15 @@ def get_dashboard_levels(current_user: dict = Depends(get_current_user)):
             "roadmap_id": roadmap["id"],
             "career_goal": roadmap["career_goal"],
             "learning_level": roadmap["learning_level"],
-            "total_levels": level_data["roadmap"]["total_levels"],
+            "total_levels": total_levels,
             "levels_completed": completed,
             "current_level": completed + 1,
-            "progress_percentage": (completed / level_data["roadmap"]["total_levels"]) * 100,
+            "progress_percentage": (completed / total_levels) * 100,
             "total_xp": xp,
             "created_at": roadmap["created_at"]
         })
     
-    conn.close()
-    
-    return {
+    return ORJSONResponse({
         "user": {
             "id": current_user["id"],
             "username": current_user["username"],
@@ -713,8 +758,34 @@ def get_dashboard_levels(current_user: dict = Depends(get_current_user)):
         "roadmaps": result,
         "total_xp": total_xp,
         "total_levels_completed": total_levels_completed
-    }
+    })
+
 
+# Chat tutor prompt; only the learner context varies per user
+_CHAT_SYSTEM_PROMPT = """You are a helpful programming and tech education tutor. 
+    {context}
+    Provide clear, practical, and encouraging explanations. 
+    Keep responses conversational and under 200 words unless asked for detailed explanations.""".format
+
+# user_id -> system prompt; short TTL so a newly created roadmap shows up quickly
+_CHAT_PROMPT_CACHE = TTLCache(maxsize=4096, ttl=60)
+
+def _build_chat_system_prompt(user_id: int) -> str:
+    """Fill the tutor prompt from the user's latest roadmap"""
+    with db.connection() as conn:
+        latest_roadmap = conn.execute(
+            """SELECT career_goal, learning_level FROM roadmaps
+               WHERE user_id = ?
+               ORDER BY created_at DESC, id DESC
+               LIMIT 1""",
+            (user_id,)
+        ).fetchone()
+    
+    context = ""
+    if latest_roadmap:
+        context = f"User is learning {latest_roadmap['career_goal']} at {latest_roadmap['learning_level']} level."
+    
+    return _CHAT_SYSTEM_PROMPT(context=context)
 
 @app.post("/api/ai-chat")
 async def ai_chat_proxy(
@@ -725,64 +796,70 @@ async def ai_chat_proxy(
     Proxy AI chat requests through backend (more secure)
     This keeps the API key completely hidden from frontend
     """
-    import requests
-    
-    # Get user context
-    roadmaps = _get_user_roadmaps(current_user["id"])
-    
-    # Build context-aware system prompt
-    context = ""
-    if roadmaps:
-        latest_roadmap = roadmaps[0]
-        context = f"User is learning {latest_roadmap['career_goal']} at {latest_roadmap['learning_level']} level."
-    
-    system_prompt = f"""You are a helpful programming and tech education tutor. 
-    {context}
-    Provide clear, practical, and encouraging explanations. 
-    Keep responses conversational and under 200 words unless asked for detailed explanations."""
+    # Context-aware system prompt, cached per user (DB work runs off the event loop)
+    system_prompt = _CHAT_PROMPT_CACHE.get(current_user["id"])
+    if system_prompt is None:
+        system_prompt = await asyncio.to_thread(_build_chat_system_prompt, current_user["id"])
+        _CHAT_PROMPT_CACHE.set(current_user["id"], system_prompt)
     
     try:
-        response = requests.post(
-            "https://api.groq.com/openai/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {GROQ_API_KEY}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "llama3-8b-8192",
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": message}
-                ],
-                "temperature": 0.7,
-                "max_tokens": 500
-            },
-            timeout=30
-        )
+        # Reuses the AI service's keep-alive session without blocking the event loop
+        response = await ai_service.achat_completion([
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": message}
+        ])
         
         if response.status_code == 200:
             data = response.json()
             return {
                 "response": data["choices"][0]["message"]["content"],
-                "model": "llama3-8b-8192"
+                "model": ai_service.model
             }
-        else:
+        
+        # Never pass Groq's status through: a 401/403 there means our API key is
+        # bad, not the caller's token. Rate limits and upstream outages are
+        # retryable (503), anything else is a bad gateway
+        log.warning("Groq chat error: %s", response.status_code)
+        if response.status_code == 429 or response.status_code >= 500:
             raise HTTPException(
-                status_code=response.status_code,
-                detail="AI service error"
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="AI service unavailable",
+                headers={"Retry-After": response.headers.get("Retry-After", "5")}
             )
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="AI service error"
+        )
             
+    except HTTPException:
+        raise
     except requests.exceptions.Timeout:
         raise HTTPException(
             status_code=status.HTTP_504_GATEWAY_TIMEOUT,
             detail="AI service timeout"
         )
-    except Exception as e:
-        print(f"AI chat error: {str(e)}")
+    except Exception:
+        log.exception("AI chat error")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to process AI request"
         )
 if __name__ == "__main__":
+    import os
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    
+    # Import string so uvicorn can spawn workers; each worker opens its own DB pool.
+    # Defaults to one worker: the token, login and chat-prompt caches live in
+    # process memory, and invalidation only reaches the worker that handled the
+    # request. Raising WORKERS trades that coherence for throughput (other
+    # workers may serve stale entries until their TTL expires).
+    # "auto" picks uvloop/httptools when uvicorn[standard] is installed
+    uvicorn.run(
+        "main:app",
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8000")),
+        workers=int(os.getenv("WORKERS", "1")),
+        loop="auto",
+        http="auto",
+        log_level="warning"
+    )
\ No newline at end of file
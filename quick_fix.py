@@ -1,21 +1,67 @@
 """
 Quick fix script - automatically fixes common issues
-Run: python quick_fix.py
+Run: python quick_fix.py [--force-reset | --keep-db]
 """
 
+import argparse
 import os
 import subprocess
 import sys
+import re
+from importlib.metadata import requires, version, PackageNotFoundError
 
-print("🔧 QUICK FIX SCRIPT")
-print("=" * 70)
-print()
+ENV_TEMPLATE = """# GROQ API Configuration
+# Get your free API key at: https://console.groq.com
+GROQ_API_KEY=your-groq-api-key-here
+
+# JWT Secret for Authentication
+JWT_SECRET=super-secret-jwt-key-12345
+"""
+
+# Run in a fresh interpreter so it sees the packages pip just installed
+VERIFY_SRC = """
+import os
+try:
+    import bcrypt
+    print(f"   ✅ bcrypt version: {bcrypt.__version__}")
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    groq_key = os.getenv("GROQ_API_KEY")
+    jwt_secret = os.getenv("JWT_SECRET")
+
+    if groq_key and groq_key != "your-groq-api-key-here":
+        print("   ✅ GROQ_API_KEY is set")
+    else:
+        print("   ⚠️  GROQ_API_KEY not set - edit .env file")
+
+    if jwt_secret:
+        print("   ✅ JWT_SECRET is set")
+    else:
+        print("   ⚠️  JWT_SECRET not set - edit .env file")
+except Exception as e:
+    print(f"   ❌ Verification error: {e}")
+"""
+
+parser = argparse.ArgumentParser(description="Fix common setup issues")
+db_choice = parser.add_mutually_exclusive_group()
+db_choice.add_argument('--force-reset', action='store_true', help="delete an existing database without asking")
+db_choice.add_argument('--keep-db', action='store_true', help="keep an existing database without asking")
+args = parser.parse_args()
+
+sys.stdout.write(f"🔧 QUICK FIX SCRIPT\n{'=' * 70}\n")
+
+def section(n, title):
+    """Write a numbered step header"""
+    sys.stdout.write(f"\n{n}️⃣ {title}\n{'-' * 70}\n")
 
 def run_command(cmd, description):
-    """Run a shell command"""
+    """Run a command given as an argv list (no shell); only stderr is kept"""
     print(f"📌 {description}...")
     try:
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+        result = subprocess.run(
+            cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+        )
         if result.returncode == 0:
             print(f"   ✅ Success")
             return True
@@ -26,106 +72,145 @@ def run_command(cmd, description):
         print(f"   ❌ Error: {str(e)}")
         return False
 
-# 1. Fix bcrypt
-print("1️⃣ FIXING BCRYPT VERSION")
-print("-" * 70)
-run_command("pip uninstall bcrypt -y", "Uninstalling old bcrypt")
-run_command("pip install bcrypt==4.0.1", "Installing bcrypt 4.0.1")
-print()
-
-# 2. Install missing dependencies
-print("2️⃣ INSTALLING DEPENDENCIES")
-print("-" * 70)
-run_command("pip install python-dotenv", "Installing python-dotenv")
-run_command("pip install -r requirements.txt", "Installing all requirements")
-print()
-
-# 3. Check .env file
-print("3️⃣ CHECKING .ENV FILE")
-print("-" * 70)
-
-if not os.path.exists('.env') or os.path.getsize('.env') == 0:
+def installed_version(package):
+    """Installed version of a distribution, or None if it is missing"""
+    try:
+        return version(package)
+    except PackageNotFoundError:
+        return None
+
+def missing_extras(package, extras):
+    """Requirements pulled in by package[extras] that are not installed
+
+    Environment markers other than the extra are not evaluated, so a
+    platform-only dependency (e.g. uvloop on Windows) may be reported; that
+    only costs a pip run, which then skips it.
+    """
+    missing = []
+    for req in requires(package) or []:
+        dep, _, marker = req.partition(";")
+        if not any(re.search(rf"extra\s*==\s*['\"]{re.escape(extra)}['\"]", marker) for extra in extras):
+            continue
+        dep_name = re.match(r"[A-Za-z0-9._-]+", dep.strip()).group(0)
+        if installed_version(dep_name) is None:
+            missing.append(dep_name)
+    return missing
+
+def outdated_requirements():
+    """Pinned specs (bcrypt + requirements.txt) whose installed version differs"""
+    specs = ["bcrypt==4.0.1"]
+    with open('requirements.txt') as f:
+        specs += [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+    outdated = []
+    for spec in specs:
+        name, _, wanted = spec.partition("==")
+        name, _, extras = name.partition("[")
+        have = installed_version(name)
+        if have != wanted:
+            outdated.append(spec)
+        elif extras and missing_extras(name, extras.rstrip("]").split(",")):
+            outdated.append(spec)
+        elif name in ("bcrypt", "python-dotenv"):
+            print(f"   ✅ {name} {have} OK")
+    return outdated
+
+# 1. Fix bcrypt and install dependencies in a single pip run
+# (pinning bcrypt==4.0.1 up/downgrades it in place, no uninstall needed;
+# pip is skipped entirely when every pin is already satisfied)
+section(1, "FIXING BCRYPT VERSION & INSTALLING DEPENDENCIES")
+outdated = outdated_requirements()
+if outdated:
+    run_command(
+        [
+            sys.executable, "-m", "pip", "install",
+            "--upgrade", "--no-input", "--disable-pip-version-check", "-q",
+            *outdated
+        ],
+        f"Installing {', '.join(outdated)}"
+    )
+else:
+    print("   ✅ All dependencies already at the pinned versions")
+
+# 2. Check .env file
+section(2, "CHECKING .ENV FILE")
+
+try:
+    env_size = os.stat('.env').st_size
+except FileNotFoundError:
+    env_size = 0
+
+if env_size == 0:
     print("   Creating .env file...")
     with open('.env', 'w') as f:
-        f.write("# GROQ API Configuration\n")
-        f.write("# Get your free API key at: https://console.groq.com\n")
-        f.write("GROQ_API_KEY=your-groq-api-key-here\n")
-        f.write("\n")
-        f.write("# JWT Secret for Authentication\n")
-        f.write("JWT_SECRET=super-secret-jwt-key-12345\n")
+        f.write(ENV_TEMPLATE)
     print("   ✅ Created .env file")
     print("   ⚠️  IMPORTANT: Edit .env and add your Groq API key!")
 else:
     print("   ✅ .env file exists")
 
-print()
+# 3. Initialize database
+section(3, "INITIALIZING DATABASE")
+
+try:
+    os.stat('learning_roadmap.db')
+    db_exists = True
+except FileNotFoundError:
+    db_exists = False
 
-# 4. Initialize database
-print("4️⃣ INITIALIZING DATABASE")
-print("-" * 70)
+if db_exists:
+    if args.force_reset:
+        reset = True
+    elif args.keep_db:
+        reset = False
+    elif sys.stdin.isatty():
+        reset = input("   Database exists. Reset it? (y/n): ").lower() == 'y'
+    else:
+        reset = False
 
-if os.path.exists('learning_roadmap.db'):
-    response = input("   Database exists. Reset it? (y/n): ")
-    if response.lower() == 'y':
-        os.remove('learning_roadmap.db')
+    if reset:
+        # WAL mode keeps -wal/-shm side files; a stale WAL would be replayed
+        # into the new database, so they go too
+        for path in ('learning_roadmap.db', 'learning_roadmap.db-wal', 'learning_roadmap.db-shm'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
         print("   🗑️  Deleted old database")
 
-run_command("python database.py", "Creating database")
-print()
+# Schema creation has no dependency on the checks below, so let it run
+# in the background and collect its exit code at the end of step 4
+print("📌 Creating database...")
+db_proc = subprocess.Popen([sys.executable, "database.py"], stdout=subprocess.DEVNULL)
 
-# 5. Verify setup
-print("5️⃣ VERIFYING SETUP")
-print("-" * 70)
+# 4. Verify setup
+section(4, "VERIFYING SETUP")
 
-try:
-    # Check bcrypt
-    import bcrypt
-    print(f"   ✅ bcrypt version: {bcrypt.__version__}")
-    
-    # Check environment
-    from dotenv import load_dotenv
-    load_dotenv()
-    groq_key = os.getenv("GROQ_API_KEY")
-    jwt_secret = os.getenv("JWT_SECRET")
-    
-    if groq_key and groq_key != "your-groq-api-key-here":
-        print(f"   ✅ GROQ_API_KEY is set")
-    else:
-        print(f"   ⚠️  GROQ_API_KEY not set - edit .env file")
-    
-    if jwt_secret:
-        print(f"   ✅ JWT_SECRET is set")
-    else:
-        print(f"   ⚠️  JWT_SECRET not set - edit .env file")
-    
-    # Check database
-    if os.path.exists('learning_roadmap.db'):
-        print(f"   ✅ Database file exists")
-    else:
-        print(f"   ❌ Database file missing")
-        
-except Exception as e:
-    print(f"   ❌ Verification error: {str(e)}")
+sys.stdout.flush()
+subprocess.run([sys.executable, "-c", VERIFY_SRC], check=False)
 
-print()
+rc = db_proc.wait()
+print("   ✅ Database created" if rc == 0 else "   ❌ DB init failed")
 
 # Summary
-print("=" * 70)
-print("✨ QUICK FIX COMPLETE!")
-print("=" * 70)
-print()
-print("📋 NEXT STEPS:")
-print()
-print("1. Edit .env file and add your Groq API key:")
-print("   Get it from: https://console.groq.com")
-print()
-print("2. Start the server:")
-print("   python -m uvicorn main:app --reload")
-print()
-print("3. Test registration:")
-print("   Visit: http://localhost:8000/docs")
-print("   Try: POST /auth/register")
-print()
-print("4. Run diagnostic:")
-print("   python diagnose.py")
-print()
\ No newline at end of file
+sys.stdout.write(f"""
+{'=' * 70}
+✨ QUICK FIX COMPLETE!
+{'=' * 70}
+
+📋 NEXT STEPS:
+
+1. Edit .env file and add your Groq API key:
+   Get it from: https://console.groq.com
+
+2. Start the server:
+   python -m uvicorn main:app --reload
+
+3. Test registration:
+   Visit: http://localhost:8000/docs
+   Try: POST /auth/register
+
+4. Run diagnostic:
+   python diagnose.py
+
+""")
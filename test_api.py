@@ -1,52 +1,170 @@
 """
 Quick test script to verify API functionality
 Run this after starting the server: python main.py
+Load run with N concurrent users: python test_api.py --users N
 """
 
+import argparse
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+import hashlib
 import json
-from time import sleep
+import os
+import sys
+import threading
+import time
+
+try:
+    import orjson
+except ImportError:  # orjson is optional for this script
+    orjson = None
 
 BASE_URL = "http://localhost:8000"
+URL_ROOT = f"{BASE_URL}/"
+URL_GOALS = f"{BASE_URL}/career-goals"
+URL_REGISTER = f"{BASE_URL}/auth/register"
+URL_LOGIN = f"{BASE_URL}/auth/login"
+URL_ME = f"{BASE_URL}/auth/me"
+URL_CREATE_ROADMAP = f"{BASE_URL}/roadmaps/create"
+URL_DASHBOARD = f"{BASE_URL}/dashboard"
+
+# Only print status lines when output is piped or QUIET=1 is set
+QUIET = not sys.stdout.isatty() or os.getenv("QUIET") == "1"
+
+# Set USE_FIXTURES=1 to replay idempotent GETs from disk between runs
+USE_FIXTURES = os.getenv("USE_FIXTURES") == "1"
+FIXTURES_DIR = "fixtures"
+EPHEMERAL_TTL = int(os.getenv("EPHEMERAL_TTL", 24 * 60 * 60))
+
+# requests.Session is not thread-safe, so every thread gets its own
+_local = threading.local()
+
+def get_session():
+    """Keep-alive session owned by the calling thread"""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = requests.Session()
+        session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+    return session
+
+def thread_request(method, url, **kwargs):
+    """Send a request on the calling thread's own session (for pool workers)"""
+    return get_session().request(method, url, **kwargs)
+
+def thread_cached_get(url):
+    """cached_get on the calling thread's own session (for pool workers)"""
+    return cached_get(get_session(), url)
+
+class FixtureResponse:
+    """Stand-in for requests.Response built from a recorded fixture"""
+
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self._body = body
+        self.text = json.dumps(body)
+        self.content = self.text.encode()
+
+    def json(self):
+        return self._body
+
+def cached_get(session, url):
+    """GET url, replaying a recorded response when USE_FIXTURES is enabled"""
+    if not USE_FIXTURES:
+        return session.get(url)
+
+    key = hashlib.blake2b(f"GET {url} ".encode(), digest_size=16).hexdigest()
+    path = os.path.join(FIXTURES_DIR, f"{key}.json")
+    try:
+        if time.time() - os.stat(path).st_mtime < EPHEMERAL_TTL:
+            with open(path) as f:
+                return FixtureResponse(200, json.load(f))
+    except (FileNotFoundError, ValueError):
+        pass
+
+    response = session.get(url)
+    if response.status_code == 200:
+        os.makedirs(FIXTURES_DIR, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(response.json(), f)
+    return response
+
+def wait_ready(session, url, timeout=5.0):
+    """Poll url until the server accepts a connection; None if it never does"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            return session.get(url, timeout=0.2)
+        except requests.exceptions.RequestException:
+            # Not listening yet, or up but slow to answer its first request
+            time.sleep(0.05)
+    return None
+
+def parse_body(response):
+    """Decode a JSON response body once; None if it is not JSON"""
+    try:
+        if orjson is not None:
+            return orjson.loads(response.content)
+        return response.json()
+    except ValueError:
+        return None
+
+def print_response(title, response, keep=False):
+    """Pretty print API response and return the parsed body
+
+    In quiet mode the body is only parsed when keep=True.
+    """
+    if QUIET:
+        print(f"{title}: {response.status_code}")
+        return parse_body(response) if keep else None
 
-def print_response(title, response):
-    """Pretty print API response"""
     print(f"\n{'='*60}")
     print(f"🔍 {title}")
     print(f"{'='*60}")
     print(f"Status: {response.status_code}")
-    try:
-        print(json.dumps(response.json(), indent=2))
-    except:
+    data = parse_body(response)
+    if data is None:
         print(response.text)
+    elif orjson is not None:
+        print(orjson.dumps(data, option=orjson.OPT_INDENT_2).decode())
+    else:
+        print(json.dumps(data, indent=2))
+    return data
 
 def test_api():
     """Run through complete API workflow"""
     
     print("🚀 Starting API Test...\n")
     
-    # 1. Check server is running
+    # Keep-alive session for this thread; pool workers use their own sessions
+    session = get_session()
+    
+    # Independent requests are fired together; results are still printed in order
+    pool = ThreadPoolExecutor(max_workers=2)
+    
+    # 1. Check server is running (waits briefly for a server that is starting up)
     print("1️⃣ Checking server...")
-    try:
-        response = requests.get(f"{BASE_URL}/")
-        print_response("Root Endpoint", response)
-    except requests.exceptions.ConnectionError:
+    response = wait_ready(session, URL_ROOT)
+    if response is None:
         print("❌ Server is not running! Start it with: python main.py")
+        pool.shutdown()
         return
+    print_response("Root Endpoint", response)
     
-    # 2. Get available career goals
+    # 2. Get available career goals (fetched alongside registration)
     print("\n2️⃣ Getting career goals...")
-    response = requests.get(f"{BASE_URL}/career-goals")
-    print_response("Career Goals", response)
-    
-    # 3. Register a test user
-    print("\n3️⃣ Registering user...")
+    goals_future = pool.submit(thread_cached_get, URL_GOALS)
     register_data = {
         "username": "demo_user",
         "password": "demo123",
         "email": "demo@example.com"
     }
-    response = requests.post(f"{BASE_URL}/auth/register", json=register_data)
+    register_future = pool.submit(thread_request, "POST", URL_REGISTER, json=register_data)
+    print_response("Career Goals", goals_future.result())
+    
+    # 3. Register a test user
+    print("\n3️⃣ Registering user...")
+    response = register_future.result()
     print_response("User Registration", response)
     
     if response.status_code == 400:
@@ -58,59 +176,63 @@ def test_api():
         "username": "demo_user",
         "password": "demo123"
     }
-    response = requests.post(
-        f"{BASE_URL}/auth/login",
+    response = session.post(
+        URL_LOGIN,
         data=login_data
     )
-    print_response("Login", response)
+    login_result = print_response("Login", response, keep=True)
     
     if response.status_code != 200:
         print("❌ Login failed!")
         return
     
-    token = response.json()["access_token"]
-    headers = {"Authorization": f"Bearer {token}"}
+    token = login_result["access_token"]
+    auth = {"Authorization": f"Bearer {token}"}
+    session.headers.update(auth)
     
-    # 5. Get current user
+    # 5. Get current user (runs while the roadmap below is being created)
     print("\n5️⃣ Getting user info...")
-    response = requests.get(f"{BASE_URL}/auth/me", headers=headers)
-    print_response("Current User", response)
-    
-    # 6. Create a roadmap
-    print("\n6️⃣ Creating roadmap...")
-    print("⏳ This may take a few seconds (generating AI explanations)...")
     roadmap_data = {
         "career_goal": "Web Developer",
         "learning_level": "Beginner",
         "existing_skills": ["HTML Basics"]
     }
-    response = requests.post(
-        f"{BASE_URL}/roadmaps/create",
+    me_future = pool.submit(thread_request, "GET", URL_ME, headers=auth)
+    create_future = pool.submit(
+        thread_request,
+        "POST",
+        URL_CREATE_ROADMAP,
         json=roadmap_data,
-        headers=headers
+        headers=auth
     )
-    print_response("Roadmap Creation", response)
+    pool.shutdown(wait=False)
+    print_response("Current User", me_future.result())
+    
+    # 6. Create a roadmap
+    print("\n6️⃣ Creating roadmap...")
+    print("⏳ This may take a few seconds (generating AI explanations)...")
+    response = create_future.result()
+    roadmap = print_response("Roadmap Creation", response, keep=True)
     
     if response.status_code != 201:
         print("❌ Roadmap creation failed!")
         return
     
-    roadmap = response.json()
     first_skill_status_id = roadmap["skills"][0]["status_id"]
+    url_skill = f"{BASE_URL}/skills/{first_skill_status_id}/update"
     
     # 7. Update a skill status
     print("\n7️⃣ Updating skill status...")
     status_update = {"status": "IN_PROGRESS"}
-    response = requests.patch(
-        f"{BASE_URL}/skills/{first_skill_status_id}/update",
-        json=status_update,
-        headers=headers
+    response = session.patch(
+        url_skill,
+        json=status_update
     )
     print_response("Skill Status Update", response)
     
     # 8. Get dashboard
     print("\n8️⃣ Getting dashboard...")
-    response = requests.get(f"{BASE_URL}/dashboard", headers=headers)
+    response = session.get(URL_DASHBOARD)
     print_response("Dashboard", response)
     
     print("\n" + "="*60)
@@ -118,5 +240,80 @@ def test_api():
     print("="*60)
     print("\n🎉 All endpoints working! Check http://localhost:8000/docs")
 
+def run_user(i):
+    """Register, log in, create a roadmap and update a skill as demo_user_{i}
+
+    Returns (user index, seconds taken, failed step or None).
+    """
+    start = time.perf_counter()
+    session = requests.Session()  # one per user: sessions are not shared across threads
+    username = f"demo_user_{i}"
+
+    response = session.post(URL_REGISTER, json={
+        "username": username,
+        "password": "demo123",
+        "email": f"{username}@example.com"
+    })
+    if response.status_code not in (200, 201, 400):
+        return i, time.perf_counter() - start, "register"
+
+    response = session.post(URL_LOGIN, data={"username": username, "password": "demo123"})
+    if response.status_code != 200:
+        return i, time.perf_counter() - start, "login"
+    session.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+    response = session.post(URL_CREATE_ROADMAP, json={
+        "career_goal": "Web Developer",
+        "learning_level": "Beginner",
+        "existing_skills": ["HTML Basics"]
+    })
+    if response.status_code != 201:
+        return i, time.perf_counter() - start, "create roadmap"
+
+    status_id = response.json()["skills"][0]["status_id"]
+    response = session.patch(
+        f"{BASE_URL}/skills/{status_id}/update",
+        json={"status": "IN_PROGRESS"}
+    )
+    if response.status_code != 200:
+        return i, time.perf_counter() - start, "update skill"
+
+    return i, time.perf_counter() - start, None
+
+def load_test(users, workers=16):
+    """Run the user workflow for many users at once and report latencies"""
+    print(f"🚀 Starting load test: {users} users, {workers} workers...\n")
+
+    if wait_ready(requests.Session(), URL_ROOT) is None:
+        print("❌ Server is not running! Start it with: python main.py")
+        return
+
+    start = time.perf_counter()
+    latencies = []
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        futures = [ex.submit(run_user, i) for i in range(users)]
+        for future in as_completed(futures):
+            i, elapsed, failed = future.result()
+            if failed:
+                print(f"   ❌ demo_user_{i}: {failed} failed after {elapsed:.2f}s")
+            else:
+                latencies.append(elapsed)
+                print(f"   ✅ demo_user_{i}: {elapsed:.2f}s")
+
+    total = time.perf_counter() - start
+    print(f"\n{len(latencies)}/{users} users succeeded in {total:.2f}s "
+          f"({users / total:.1f} users/s)")
+    if latencies:
+        latencies.sort()
+        print(f"p50 {latencies[len(latencies) // 2]:.2f}s, max {latencies[-1]:.2f}s")
+
 if __name__ == "__main__":
-    test_api()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Exercise the API against a running server")
+    parser.add_argument('--users', type=int, default=0, help="run a concurrent load test with this many users")
+    parser.add_argument('--workers', type=int, default=16, help="threads used by the load test")
+    args = parser.parse_args()
+
+    if args.users:
+        load_test(args.users, args.workers)
+    else:
+        test_api()
\ No newline at end of file